@@ -1,65 +1,12 @@
 import backtrader as bt
-import yfinance as yf
+from stock_analysis.data_fetcher import fetch_data as fetch_stored_data
+from stock_analysis.universe import load_universe
+from stock_analysis.strategies import ConsolidationBreakout
+from stock_analysis.trade_log import TradeLog
 import pandas as pd
+from pathlib import Path
 
-class ConsolidationBreakout(bt.Strategy):
-    params = (
-        ('consolidation_period', 3),  # Consolidation period in months
-        ('target_pct', 100),          # Target percentage of the closing price on breakout
-    )
-
-    def __init__(self):
-        self.buy_prices = []
-        self.sell_prices = []
-        self.trades = []
-
-    def next(self):
-        if not self.position:
-            if self.is_consolidating():
-                consolidation_period_days = self.params.consolidation_period * 22
-                self.consolidation_low = min(self.data.close.get(size=consolidation_period_days))
-                self.consolidation_high = max(self.data.close.get(size=consolidation_period_days))
-                if self.data.close[0] > self.consolidation_high:  # Breakout condition
-                    size = self.broker.get_cash() // self.data.close[0]
-                    size = min(size, 30000 // self.data.close[0])
-                    if size > 0:
-                        self.buy(price=self.data.close[0], size=size)
-                        self.buy_prices.append((self.data.datetime.date(0), self.data.close[0]))
-                        self.target_price = self.data.close[0] * (1 + self.params.target_pct / 100)
-                        self.stop_price = self.consolidation_low
-        else:
-            if self.data.close[0] >= self.target_price or self.data.close[0] <= self.stop_price:
-                self.sell(price=self.data.close[0])
-                self.sell_prices.append((self.data.datetime.date(0), self.data.close[0]))
-
-    def is_consolidating(self):
-        closes = self.data.close.get(size=self.params.consolidation_period * 22)
-        if len(closes) < self.params.consolidation_period * 22:
-            return False
-
-        max_close = max(closes)
-        min_close = min(closes)
-        current_high = self.data.high[0]
-        current_low = self.data.low[0]
-
-        is_in_range = current_high < max_close and current_low > min_close
-
-        return is_in_range and all(
-            closes[i] <= max_close and closes[i] >= min_close for i in range(len(closes))
-        )
-
-    def notify_trade(self, trade):
-        if trade.isclosed:
-            trade_info = {
-                'ticker': trade.data._name,
-                'buy_date': self.buy_prices[-1][0] if self.buy_prices else None,
-                'buy_price': self.buy_prices[-1][1] if self.buy_prices else None,
-                'sell_date': self.sell_prices[-1][0] if self.sell_prices else None,
-                'sell_price': self.sell_prices[-1][1] if self.sell_prices else None,
-                'profit': trade.pnl,
-                'profit_percent': (trade.pnl / trade.price) * 100 if trade.price else 0
-            }
-            self.trades.append(trade_info)
+LISTING_FILE = Path(__file__).resolve().parent.parent / 'EQUITY_L.csv'
 
 class MaxCashSizer(bt.Sizer):
     params = (
@@ -74,36 +21,24 @@ class MaxCashSizer(bt.Sizer):
         return self.broker.getposition(data).size
 
 def fetch_data(ticker, start_date, end_date):
-    df = yf.download(ticker, start=start_date, end=end_date, interval='1mo')
-    df.rename(columns={'Adj Close': 'close'}, inplace=True)  # Ensure compatibility with Backtrader
+    df = fetch_stored_data(ticker, start_date, end_date, interval='1mo', adjusted=True)  # Split/dividend adjusted OHLC
     return df
 
-def get_market_cap(ticker):
-    try:
-        ticker_info = yf.Ticker(ticker).info
-        if ticker_info and 'marketCap' in ticker_info and ticker_info['marketCap'] is not None:
-            return ticker_info['marketCap']
-        else:
-            return None
-    except Exception as e:
-        return None
-
 def main():
     start_date = '2005-01-01'
     end_date = '2024-06-14'
     
     equity_file = '../equity.csv'
     stocks = pd.read_csv(equity_file)['Ticker'].tolist()
+    universe = load_universe(stocks, listing_file=LISTING_FILE)
+    stocks = universe.filter(listed_before=end_date, start=start_date, end=end_date, interval='1mo',
+                             min_market_cap=2000000000)  # 2000 crore
 
-    all_trades = []
+    # Trades go to disk as tickers finish; the reports are built from the log at the end
+    all_trades = TradeLog('trade_log/all_trades_detailed')
 
     for ticker in stocks:
         print(f'Analyzing {ticker}...')
-        market_cap = get_market_cap(f'{ticker}.NS')
-        if market_cap is None or market_cap < 2000000000:  # 2000 crore
-            print(f"Skipping {ticker} due to low market cap or missing data.")
-            continue
-        
         df = fetch_data(f'{ticker}.NS', start_date, end_date)
         if df.empty:
             print(f"No data for {ticker}. Skipping.")
@@ -113,7 +48,7 @@ def main():
 
         cerebro = bt.Cerebro()
         cerebro.addstrategy(ConsolidationBreakout)
-        cerebro.adddata(data)
+        cerebro.adddata(data, name=ticker)
         cerebro.broker.set_cash(100000)
         cerebro.addsizer(MaxCashSizer)
 
@@ -132,9 +67,8 @@ def main():
             trades['Ticker'] = ticker
             all_trades.append(trades)
 
-    if all_trades:
-        all_trades_df = pd.concat(all_trades, ignore_index=True)
-        all_trades_df.to_csv('all_trades_detailed.csv', index=False)
+    if all_trades.compact('all_trades_detailed.csv'):
+        all_trades_df = all_trades.read(columns=['Ticker', 'profit'])
         
         # Summary statistics
         total_trades = len(all_trades_df)
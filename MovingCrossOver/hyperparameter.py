@@ -1,49 +1,23 @@
 import backtrader as bt
-import yfinance as yf
+from stock_analysis.data_fetcher import fetch_data as fetch_stored_data
+from stock_analysis.universe import load_universe
+from stock_analysis.strategies import MovingAverageCrossover
+from stock_analysis.sweep import run_sweep
+from stock_analysis.journal import RunJournal
+from stock_analysis.panel import load_panel, panel_path
+from stock_analysis.crossover_sweep import crossover_sweep_chunks, pair_statistics
+from stock_analysis.trade_log import TradeLog
 import pandas as pd
+from pathlib import Path
 import itertools
 import numpy as np
+import os
 
-class MovingAverageCrossover(bt.Strategy):
-    params = (
-        ('fast_period', 10),
-        ('slow_period', 30),
-    )
+LISTING_FILE = Path(__file__).resolve().parent.parent / 'EQUITY_L.csv'
 
-    def __init__(self):
-        self.fast_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.fast_period)
-        self.slow_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.slow_period)
-        self.crossover = bt.indicators.CrossOver(self.fast_ma, self.slow_ma)
-
-        self.buy_prices = []
-        self.sell_prices = []
-        self.trades = []
-
-    def next(self):
-        if not self.position:
-            if self.crossover > 0:  # Fast MA crosses above Slow MA
-                size = self.broker.get_cash() // self.data.close[0]
-                size = min(size, 30000 // self.data.close[0])
-                if size > 0:
-                    self.buy(price=self.data.close[0], size=size)
-                    self.buy_prices.append((self.data.datetime.date(0), self.data.close[0]))
-        else:
-            if self.crossover < 0:  # Fast MA crosses below Slow MA
-                self.sell(price=self.data.close[0])
-                self.sell_prices.append((self.data.datetime.date(0), self.data.close[0]))
-
-    def notify_trade(self, trade):
-        if trade.isclosed:
-            trade_info = {
-                'ticker': trade.data._name,
-                'buy_date': self.buy_prices[-1][0] if self.buy_prices else None,
-                'buy_price': self.buy_prices[-1][1] if self.buy_prices else None,
-                'sell_date': self.sell_prices[-1][0] if self.sell_prices else None,
-                'sell_price': self.sell_prices[-1][1] if self.sell_prices else None,
-                'profit': trade.pnl,
-                'profit_percent': (trade.pnl / trade.price) * 100 if trade.price else 0
-            }
-            self.trades.append(trade_info)
+PAIR_SWEEP = True  # Run the whole fast x slow grid in one array pass (stock_analysis.crossover_sweep)
+FAST_PERIODS = [5, 7, 10, 13, 15, 20, 23, 25]
+SLOW_PERIODS = [30, 33, 35, 37, 40, 43, 45, 47, 50, 52]
 
 class MaxCashSizer(bt.Sizer):
     params = (
@@ -58,18 +32,14 @@ class MaxCashSizer(bt.Sizer):
         return self.broker.getposition(data).size
 
 def fetch_data(ticker, start_date, end_date):
-    df = yf.download(ticker, start=start_date, end=end_date, interval='1mo')
+    df = fetch_stored_data(ticker, start_date, end_date, interval='1mo')
     return df
 
-def get_market_cap(ticker):
-    try:
-        ticker_info = yf.Ticker(ticker).info
-        if ticker_info and 'marketCap' in ticker_info and ticker_info['marketCap'] is not None:
-            return ticker_info['marketCap']
-        else:
-            return None
-    except Exception as e:
-        return None
+def grid_file_prefix(fast_periods, slow_periods):
+    # 25_30 for a single pair, FM_10_15_20-SM_30_35_40 for a grid
+    if len(fast_periods) == 1 and len(slow_periods) == 1:
+        return f'{fast_periods[0]}_{slow_periods[0]}'
+    return f"FM_{'_'.join(map(str, fast_periods))}-SM_{'_'.join(map(str, slow_periods))}"
 
 def main():
     start_date = '2000-01-01'
@@ -78,60 +48,56 @@ def main():
     equity_file = '../equity_full.csv'
     stocks = pd.read_csv(equity_file)['Ticker'].tolist()
 
-    all_trades = []
-
-    # Hyperparameter grid
-    fast_periods = [25] #[5, 7, 10, 13, 15, 20, 23, 25]   
-    slow_periods = [30] #[30, 33, 35, 37, 40, 43, 45, 47, 50, 52]      
+    # Hyperparameter grid: the pair sweep runs all 80 pairs in minutes, a cerebro per pair and
+    # ticker only the 25/30 pair
+    fast_periods = FAST_PERIODS if PAIR_SWEEP else [25]
+    slow_periods = SLOW_PERIODS if PAIR_SWEEP else [30]
     hyperparams = list(itertools.product(fast_periods, slow_periods))
-
-    for ticker in stocks:
-        print(f'Analyzing {ticker}...')
-        market_cap = get_market_cap(f'{ticker}.NS')
-        if market_cap is None or market_cap < 2000000000: #2000 crore
-            print(f"Skipping {ticker} due to low market cap or missing data.")
-            continue
-        
-        df = fetch_data(f'{ticker}.NS', start_date, end_date)
-        if df.empty:
-            print(f"No data for {ticker}. Skipping.")
-            continue
-
-        if len(df) < max(fast_periods + slow_periods):
-            print(f"Not enough data for {ticker}. Skipping.")
-            continue
-
-        for fast_period, slow_period in hyperparams:
-            print(f"Testing {ticker} with fast_period={fast_period} and slow_period={slow_period}")
-            
-            data = bt.feeds.PandasData(dataname=df)
-
-            cerebro = bt.Cerebro()
-            cerebro.addstrategy(MovingAverageCrossover, fast_period=fast_period, slow_period=slow_period)
-            cerebro.adddata(data)
-            cerebro.broker.set_cash(100000)
-            cerebro.addsizer(MaxCashSizer)
-
-            cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trade')
-
-            try:
-                result = cerebro.run()
-            except Exception as e:
-                print(f"Error running strategy for {ticker}: {e}")
-                continue
-
-            strategy = result[0]
-            trades = pd.DataFrame(strategy.trades)
-
-            if not trades.empty:
-                trades['Ticker'] = ticker
-                trades['Fast Period'] = fast_period
-                trades['Slow Period'] = slow_period
-                all_trades.append(trades)
-
-    if all_trades:
-        all_trades_df = pd.concat(all_trades, ignore_index=True)
-        all_trades_df.to_csv('25_30_all_trades_detailed.csv', index=False)
+    grid_name = grid_file_prefix(fast_periods, slow_periods)
+
+    # Trades go to disk as tickers finish; the reports are built from the log at the end
+    all_trades = TradeLog(f'trade_log/{grid_name}_all_trades_detailed')
+
+    universe = load_universe(stocks, listing_file=LISTING_FILE)
+    stocks = universe.filter(listed_before=end_date, start=start_date, end=end_date, interval='1mo',
+                             min_bars=max(fast_periods + slow_periods),
+                             min_market_cap=2000000000)  # 2000 crore
+
+    if PAIR_SWEEP:
+        # Every SMA period computed once per ticker, every pair as its own column
+        universe_name = os.path.splitext(os.path.basename(equity_file))[0]
+        panel = load_panel(stocks, start_date, end_date, interval='1mo', suffix='.NS',
+                           root=panel_path(universe_name, start_date, end_date, interval='1mo'))
+        for trades in crossover_sweep_chunks(panel, fast_periods, slow_periods, tickers=stocks,
+                                             min_bars=max(fast_periods + slow_periods)):
+            all_trades.append(trades)
+    else:
+        grid = [dict(fast_period=fast_period, slow_period=slow_period) for fast_period, slow_period in hyperparams]
+        # Finished pairs are journaled per ticker, so an interrupted run picks up where it stopped
+        journal = RunJournal(f'trade_log/journal_{start_date}_{end_date}_1mo.sqlite')
+        for records in run_sweep(MovingAverageCrossover, grid, stocks, start_date, end_date, sizer=MaxCashSizer,
+                                 min_bars=max(fast_periods + slow_periods), journal=journal):
+            for record in records:
+                ticker, params = record['ticker'], record['params']
+                if 'skipped' in record:
+                    print(f"{record['skipped']} for {ticker}. Skipping.")
+                    break
+                if 'error' in record:
+                    print(f"Error running strategy for {ticker}: {record['error']}")
+                    continue
+
+                trades = pd.DataFrame(record['trades'])
+                if not trades.empty:
+                    trades['Ticker'] = ticker
+                    trades['Fast Period'] = params['fast_period']
+                    trades['Slow Period'] = params['slow_period']
+                    all_trades.append(trades)
+        journal.close()
+
+    if all_trades.compact(f'{grid_name}_all_trades_detailed.csv'):
+        # Only the columns the statistics need are read back from the log
+        all_trades_df = all_trades.read(columns=['Ticker', 'Fast Period', 'Slow Period', 'profit'])
+        pair_statistics(all_trades_df).to_csv(f'{grid_name}_pair_statistics.csv', index=False)
         
         # Summary statistics
         total_trades = len(all_trades_df)
@@ -160,8 +126,8 @@ def main():
         }
 
         summary_df = pd.DataFrame([summary])
-        summary_df.to_csv('25_30_trading_summary.csv', index=False)
-        print("Trading summary saved to trading_summary.csv")
+        summary_df.to_csv(f'{grid_name}_trading_summary.csv', index=False)
+        print(f"Trading summary saved to {grid_name}_trading_summary.csv")
     else:
         print("No trades to report.")
 
@@ -1,7 +1,17 @@
 import backtrader as bt
-import yfinance as yf
+from stock_analysis.data_fetcher import fetch_data as fetch_stored_data
+from stock_analysis.universe import load_universe
+from stock_analysis.panel import load_panel, panel_path
+from stock_analysis.crossover_sweep import crossover_signal_chunks
+from stock_analysis.trade_log import TradeLog
 import pandas as pd
+from pathlib import Path
 import itertools
+import os
+
+LISTING_FILE = Path(__file__).resolve().parent.parent / 'EQUITY_L.csv'
+
+SIGNAL_SCAN = True  # Find the crossovers straight from the price arrays, without a Cerebro per ticker and pair
 
 class MovingAverageCrossover(bt.Strategy):
     params = (
@@ -21,19 +31,9 @@ class MovingAverageCrossover(bt.Strategy):
             self.buy_signals.append((self.data.datetime.date(0), self.data.close[0]))
 
 def fetch_data(ticker, start_date, end_date):
-    df = yf.download(ticker, start=start_date, end=end_date, interval='1mo')
+    df = fetch_stored_data(ticker, start_date, end_date, interval='1mo')
     return df
 
-def get_market_cap(ticker):
-    try:
-        ticker_info = yf.Ticker(ticker).info
-        if ticker_info and 'marketCap' in ticker_info and ticker_info['marketCap'] is not None:
-            return ticker_info['marketCap']
-        else:
-            return None
-    except Exception as e:
-        return None
-
 def main():
     start_date = '2000-01-01'
     end_date = '2024-06-19'
@@ -41,57 +41,66 @@ def main():
     equity_file = '../equity_full.csv'
     stocks = pd.read_csv(equity_file)['Ticker'].tolist()
 
-    all_buy_signals = []
+    # Signals go to disk as tickers finish and are compacted into the CSV at the end
+    all_buy_signals = TradeLog('trade_log/just_buy_signals')
 
     # Hyperparameter grid
     fast_periods = [25] #[5, 7, 10, 13, 15, 20, 23, 25]   
     slow_periods = [30] #[30, 33, 35, 37, 40, 43, 45, 47, 50, 52]      
     hyperparams = list(itertools.product(fast_periods, slow_periods))
 
-    for ticker in stocks:
-        print(f'Analyzing {ticker}...')
-        market_cap = get_market_cap(f'{ticker}.NS')
-        if market_cap is None or market_cap < 2000000000: #2000 crore
-            print(f"Skipping {ticker} due to low market cap or missing data.")
-            continue
-        
-        df = fetch_data(f'{ticker}.NS', start_date, end_date)
-        if df.empty:
-            print(f"No data for {ticker}. Skipping.")
-            continue
-
-        if len(df) < max(fast_periods + slow_periods):
-            print(f"Not enough data for {ticker}. Skipping.")
-            continue
-
-        for fast_period, slow_period in hyperparams:
-            print(f"Testing {ticker} with fast_period={fast_period} and slow_period={slow_period}")
+    universe = load_universe(stocks, listing_file=LISTING_FILE)
+    stocks = universe.filter(listed_before=end_date, start=start_date, end=end_date, interval='1mo',
+                             min_bars=max(fast_periods + slow_periods),
+                             min_market_cap=2000000000)  # 2000 crore
+
+    if SIGNAL_SCAN:
+        # Only the signals are wanted, so no orders, broker or analyzers: every pair of every
+        # ticker is evaluated in one array pass over the panel
+        universe_name = os.path.splitext(os.path.basename(equity_file))[0]
+        panel = load_panel(stocks, start_date, end_date, interval='1mo', suffix='.NS',
+                           root=panel_path(universe_name, start_date, end_date, interval='1mo'))
+        for buy_signals in crossover_signal_chunks(panel, fast_periods, slow_periods, tickers=stocks,
+                                                   min_bars=max(fast_periods + slow_periods)):
+            all_buy_signals.append(buy_signals)
+    else:
+        for ticker in stocks:
+            print(f'Analyzing {ticker}...')
+            df = fetch_data(f'{ticker}.NS', start_date, end_date)
+            if df.empty:
+                print(f"No data for {ticker}. Skipping.")
+                continue
+
+            if len(df) < max(fast_periods + slow_periods):
+                print(f"Not enough data for {ticker}. Skipping.")
+                continue
+
+            for fast_period, slow_period in hyperparams:
+                print(f"Testing {ticker} with fast_period={fast_period} and slow_period={slow_period}")
             
-            data = bt.feeds.PandasData(dataname=df)
+                data = bt.feeds.PandasData(dataname=df)
 
-            cerebro = bt.Cerebro()
-            cerebro.addstrategy(MovingAverageCrossover, fast_period=fast_period, slow_period=slow_period)
-            cerebro.adddata(data)
-            cerebro.broker.set_cash(100000)
+                cerebro = bt.Cerebro()
+                cerebro.addstrategy(MovingAverageCrossover, fast_period=fast_period, slow_period=slow_period)
+                cerebro.adddata(data)
+                cerebro.broker.set_cash(100000)
 
-            try:
-                result = cerebro.run()
-            except Exception as e:
-                print(f"Error running strategy for {ticker}: {e}")
-                continue
+                try:
+                    result = cerebro.run()
+                except Exception as e:
+                    print(f"Error running strategy for {ticker}: {e}")
+                    continue
 
-            strategy = result[0]
-            buy_signals = pd.DataFrame(strategy.buy_signals, columns=['Buy Date', 'Buy Price'])
+                strategy = result[0]
+                buy_signals = pd.DataFrame(strategy.buy_signals, columns=['Buy Date', 'Buy Price'])
 
-            if not buy_signals.empty:
-                buy_signals['Ticker'] = ticker
-                buy_signals['Fast Period'] = fast_period
-                buy_signals['Slow Period'] = slow_period
-                all_buy_signals.append(buy_signals)
+                if not buy_signals.empty:
+                    buy_signals['Ticker'] = ticker
+                    buy_signals['Fast Period'] = fast_period
+                    buy_signals['Slow Period'] = slow_period
+                    all_buy_signals.append(buy_signals)
 
-    if all_buy_signals:
-        all_buy_signals_df = pd.concat(all_buy_signals, ignore_index=True)
-        all_buy_signals_df.to_csv('just_buy_signals.csv', index=False)
+    if all_buy_signals.compact('just_buy_signals.csv'):
         print("Buy signals saved to just_buy_signals.csv")
     else:
         print("No buy signals to report.")
@@ -1,8 +1,14 @@
 import backtrader as bt
-import yfinance as yf
+from stock_analysis.universe import load_universe
+from stock_analysis.trade_log import TradeLog
+from stock_analysis.batch import run_batch, summary_row
+from stock_analysis.journal import RunJournal
 import pandas as pd
+from pathlib import Path
 import os
 
+LISTING_FILE = Path(__file__).resolve().parent.parent / 'EQUITY_L.csv'
+
 class BuyWithRSIAndMovingAverages(bt.Strategy):
     params = (
         ('ma_period1', 21),
@@ -75,106 +81,45 @@ class MaxCashSizer(bt.Sizer):
             return size
         return self.broker.getposition(data).size
 
-def fetch_data(ticker, start_date, end_date):
-    df = yf.download(ticker, start=start_date, end=end_date, interval='1mo')
-    return df
-
-def get_market_cap(ticker):
-    try:
-        ticker_info = yf.Ticker(ticker).info
-        if ticker_info and 'marketCap' in ticker_info and ticker_info['marketCap'] is not None:
-            return ticker_info['marketCap']
-        else:
-            print(f"Market cap information not available for {ticker}")
-            return None
-    except Exception as e:
-        print(f"Error fetching market cap for {ticker}: {e}")
-        return None
-
 def main():
     start_date = '2005-01-01'
     end_date = '2024-06-14'
     
     equity_file = 'equity_full.csv'
     stocks = pd.read_csv(equity_file)['Ticker'].tolist()
-
-    all_trades = []
-    completed_trades = []
-
-    for ticker in stocks:
-        print(f'Analyzing {ticker}...')
-        market_cap = get_market_cap(f'{ticker}.NS')
-        if market_cap is None or market_cap < 2000000000: #2000 crore
-            print(f"Skipping {ticker} due to low market cap or missing data.")
-            continue
-        
-        df = fetch_data(f'{ticker}.NS', start_date, end_date)
-        if df.empty:
-            print(f"No data for {ticker}. Skipping.")
+    universe = load_universe(stocks, listing_file=LISTING_FILE)
+    stocks = universe.filter(listed_before=end_date, start=start_date, end=end_date, interval='1mo',
+                             min_bars=max(21, 36, 14),
+                             min_market_cap=2000000000)  # 2000 crore
+
+    # Rows go to disk as tickers finish; the CSV reports are compacted from the logs at the end
+    all_trades = TradeLog('trade_log/7S_all_trades')
+    completed_trades = TradeLog('trade_log/7S_completed_trades')
+
+    # Finished tickers are journaled, so a rerun after an interruption only runs what is left.
+    # The logs are cleared above and rebuilt from the journal and the new records. One process,
+    # since the strategy and sizer live in this script.
+    journal = RunJournal(f'trade_log/7S_journal_{start_date}_{end_date}_1mo.sqlite')
+    runs = {'seven_star': {'strategy': BuyWithRSIAndMovingAverages, 'sizer': MaxCashSizer, 'min_bars': max(21, 36, 14)}}
+    for records in run_batch(runs, stocks, start_date, end_date, workers=1, journal=journal):
+        record = records['seven_star']
+        ticker = record['ticker']
+        if 'skipped' in record:
+            print(f"{record['skipped']} for {ticker}. Skipping.")
             continue
-
-        if len(df) < max(21, 36, 14):
-            print(f"Not enough data for {ticker}. Skipping.")
+        if 'error' in record:
+            print(f"Error running strategy for {ticker}: {record['error']}")
             continue
+        all_trades.append([summary_row(record)])
+        completed_trades.append(record['trades'])
+    journal.close()
 
-        data = bt.feeds.PandasData(dataname=df)
-
-        cerebro = bt.Cerebro()
-        cerebro.addstrategy(BuyWithRSIAndMovingAverages)
-        cerebro.adddata(data)
-        cerebro.broker.set_cash(100000)
-        cerebro.addsizer(MaxCashSizer)
-
-        cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trade')
-
-        try:
-            result = cerebro.run()
-        except Exception as e:
-            print(f"Error running strategy for {ticker}: {e}")
-            continue
-
-        strategy = result[0]
-        trade_analysis = strategy.analyzers.trade.get_analysis()
-
-        trades = pd.DataFrame(strategy.trades)
-
-        if not trades.empty:
-            trade_summary = pd.DataFrame({
-                'Ticker': [ticker],
-                'Total Trades': [trade_analysis.total.closed if 'total' in trade_analysis and 'closed' in trade_analysis.total else 0],
-                'Profitable Trades': [trade_analysis.won.total if 'won' in trade_analysis else 0],
-                'Losing Trades': [trade_analysis.lost.total if 'lost' in trade_analysis else 0],
-                'Total Profit/Loss': [int(round(trade_analysis.pnl.net.total)) if 'pnl' in trade_analysis and 'net' in trade_analysis.pnl else 0],
-                'Profit Percentage': [round((trade_analysis.pnl.net.total / 100000) * 100, 2) if 'pnl' in trade_analysis and 'net' in trade_analysis.pnl else 0],
-                'Buy Prices': [', '.join(map(str, trades['buy_price'].dropna().tolist()))],
-                'Sell Prices': [', '.join(map(str, trades['sell_price'].dropna().tolist()))],
-            })
-
-            completed_trades.append(trades)
-        else:
-            trade_summary = pd.DataFrame({
-                'Ticker': [ticker],
-                'Total Trades': [0],
-                'Profitable Trades': [0],
-                'Losing Trades': [0],
-                'Total Profit/Loss': [0],
-                'Profit Percentage': [0],
-                'Buy Prices': [''],
-                'Sell Prices': [''],
-            })
-
-        all_trades.append(trade_summary)
-
-    if all_trades:
-        all_trades_df = pd.concat(all_trades, ignore_index=True)
-        all_trades_df.to_csv('7S_all_trades_report.csv', index=False)
+    if all_trades.compact('7S_all_trades_report.csv'):
         print("All trades report saved to all_trades_report.csv")
     else:
         print("No trades to report.")
 
-    if completed_trades:
-        completed_trades_df = pd.concat(completed_trades, ignore_index=True)
-        completed_trades_df.to_csv('7S_completed_trades_report.csv', index=False)
+    if completed_trades.compact('7S_completed_trades_report.csv'):
         print("Completed trades report saved to completed_trades_report.csv")
     else:
         print("No completed trades to report.")
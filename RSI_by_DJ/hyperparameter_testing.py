@@ -1,8 +1,16 @@
 import backtrader as bt
-import yfinance as yf
+from stock_analysis.data_fetcher import fetch_data as fetch_stored_data
+from stock_analysis.universe import load_universe
+from stock_analysis.indicator_cache import cached_indicator
+from stock_analysis.sweep import run_sweep, param_grid
+from stock_analysis.journal import RunJournal
+from stock_analysis.trade_log import SweepDataset
 import pandas as pd
+from pathlib import Path
 import os
 
+LISTING_FILE = Path(__file__).resolve().parent.parent / 'EQUITY_L.csv'
+
 # Define the range of parameters for hyperparameter testing
 MA_PERIOD1_RANGE = [14, 21, 28]
 MA_PERIOD2_RANGE = [30, 36, 42]
@@ -16,9 +24,10 @@ class BuyWithRSIAndMovingAverages(bt.Strategy):
     )
 
     def __init__(self):
-        self.ma1 = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.ma_period1)
-        self.ma2 = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.ma_period2)
-        self.rsi = bt.indicators.RelativeStrengthIndex(self.data.close, period=self.params.rsi_period)
+        # Shared across the parameter grid: each (ticker, indicator, period) is computed once
+        self.ma1 = cached_indicator(self.data, 'sma', self.params.ma_period1)
+        self.ma2 = cached_indicator(self.data, 'sma', self.params.ma_period2)
+        self.rsi = cached_indicator(self.data, 'rsi', self.params.rsi_period)
 
         self.buy_signal = bt.indicators.CrossOver(self.ma1, self.ma2)
         self.buy_prices = []
@@ -73,20 +82,11 @@ class MaxCashSizer(bt.Sizer):
         return self.broker.getposition(data).size
 
 def fetch_data(ticker, start_date, end_date):
-    df = yf.download(ticker, start=start_date, end=end_date, interval='1mo')
+    df = fetch_stored_data(ticker, start_date, end_date, interval='1mo')
     return df
 
-def get_market_cap(ticker):
-    try:
-        ticker_info = yf.Ticker(ticker).info
-        if ticker_info and 'marketCap' in ticker_info and ticker_info['marketCap'] is not None:
-            return ticker_info['marketCap']
-        else:
-            print(f"Market cap information not available for {ticker}")
-            return None
-    except Exception as e:
-        print(f"Error fetching market cap for {ticker}: {e}")
-        return None
+def min_bars(params):
+    return max(params['ma_period1'], params['ma_period2'], params['rsi_period'])
 
 def main():
     start_date = '2005-01-01'
@@ -94,98 +94,80 @@ def main():
     
     equity_file = 'equity_full.csv'
     stocks = pd.read_csv(equity_file)['Ticker'].tolist()
+    universe = load_universe(stocks, listing_file=LISTING_FILE)
+    stocks = universe.filter(listed_before=end_date, start=start_date, end=end_date, interval='1mo',
+                             min_bars=max(min(MA_PERIOD1_RANGE), min(MA_PERIOD2_RANGE), min(RSI_PERIOD_RANGE)),
+                             min_market_cap=2000000000)  # 2000 crore
+
+    # Every combination of a ticker runs in the same worker, on bars fetched once
+    grid = param_grid(ma_period1=MA_PERIOD1_RANGE, ma_period2=MA_PERIOD2_RANGE, rsi_period=RSI_PERIOD_RANGE)
+    # One dataset per report, partitioned by MA1/MA2/RSI; SweepDataset(...).read(MA1=21) reads
+    # just those combinations back
+    all_trades_dataset = SweepDataset('sweep_results/all_trades', ['MA1', 'MA2', 'RSI'])
+    completed_trades_dataset = SweepDataset('sweep_results/completed_trades', ['MA1', 'MA2', 'RSI'])
+    # Each combination's rows go to its partition as tickers finish
+    combinations = [{'MA1': params['ma_period1'], 'MA2': params['ma_period2'], 'RSI': params['rsi_period']}
+                    for params in grid]
+    all_trades_logs = [all_trades_dataset.log(combination) for combination in combinations]
+    completed_trades_logs = [completed_trades_dataset.log(combination) for combination in combinations]
+
+    # Finished combinations are journaled per ticker, so an interrupted run picks up where it stopped
+    journal = RunJournal(f'trade_log/journal_{start_date}_{end_date}_1mo.sqlite')
+    for records in run_sweep(BuyWithRSIAndMovingAverages, grid, stocks, start_date, end_date,
+                             sizer=MaxCashSizer, min_bars=min_bars, journal=journal):
+        for all_trades, completed_trades, record in zip(all_trades_logs, completed_trades_logs, records):
+            ticker = record['ticker']
+            if 'skipped' in record:
+                print(f"{record['skipped']} for {ticker}. Skipping.")
+                continue
+            if 'error' in record:
+                print(f"Error running strategy for {ticker}: {record['error']}")
+                continue
+
+            summary = record['summary']
+            trades = pd.DataFrame(record['trades'])
+
+            # The MA1/MA2/RSI columns are the partition's directory names
+            if not trades.empty:
+                trade_summary = pd.DataFrame({
+                    'Ticker': [ticker],
+                    'Total Trades': [summary['closed']],
+                    'Profitable Trades': [summary['won']],
+                    'Losing Trades': [summary['lost']],
+                    'Total Profit/Loss': [int(round(summary['pnl_net'])) if summary['pnl_net'] is not None else 0],
+                    'Profit Percentage': [round((summary['pnl_net'] / 100000) * 100, 2) if summary['pnl_net'] is not None else 0],
+                    'Buy Prices': [', '.join(map(str, trades['buy_price'].dropna().tolist()))],
+                    'Sell Prices': [', '.join(map(str, trades['sell_price'].dropna().tolist()))],
+                })
+
+                completed_trades.append(trades)
+            else:
+                trade_summary = pd.DataFrame({
+                    'Ticker': [ticker],
+                    'Total Trades': [0],
+                    'Profitable Trades': [0],
+                    'Losing Trades': [0],
+                    'Total Profit/Loss': [0],
+                    'Profit Percentage': [0],
+                    'Buy Prices': [''],
+                    'Sell Prices': [''],
+                })
+
+            all_trades.append(trade_summary)
+    journal.close()
+
+    for combination, all_trades, completed_trades in zip(combinations, all_trades_logs, completed_trades_logs):
+        all_trades.flush()
+        if all_trades.parts():
+            print(f"All trades report saved to {all_trades_dataset.partition(combination)}")
+        else:
+            print("No trades to report.")
 
-    all_trades = []
-    completed_trades = []
-
-    for ma_period1 in MA_PERIOD1_RANGE:
-        for ma_period2 in MA_PERIOD2_RANGE:
-            for rsi_period in RSI_PERIOD_RANGE:
-                for ticker in stocks:
-                    print(f'Analyzing {ticker} with MA1={ma_period1}, MA2={ma_period2}, RSI={rsi_period}...')
-                    market_cap = get_market_cap(f'{ticker}.NS')
-                    if market_cap is None or market_cap < 2000000000: #2000 crore
-                        print(f"Skipping {ticker} due to low market cap or missing data.")
-                        continue
-                    
-                    df = fetch_data(f'{ticker}.NS', start_date, end_date)
-                    if df.empty:
-                        print(f"No data for {ticker}. Skipping.")
-                        continue
-
-                    if len(df) < max(ma_period1, ma_period2, rsi_period):
-                        print(f"Not enough data for {ticker}. Skipping.")
-                        continue
-
-                    data = bt.feeds.PandasData(dataname=df)
-
-                    cerebro = bt.Cerebro()
-                    cerebro.addstrategy(BuyWithRSIAndMovingAverages, ma_period1=ma_period1, ma_period2=ma_period2, rsi_period=rsi_period)
-                    cerebro.adddata(data)
-                    cerebro.broker.set_cash(100000)
-                    cerebro.addsizer(MaxCashSizer)
-
-                    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trade')
-
-                    try:
-                        result = cerebro.run()
-                    except Exception as e:
-                        print(f"Error running strategy for {ticker}: {e}")
-                        continue
-
-                    strategy = result[0]
-                    trade_analysis = strategy.analyzers.trade.get_analysis()
-
-                    trades = pd.DataFrame(strategy.trades)
-
-                    if not trades.empty:
-                        trade_summary = pd.DataFrame({
-                            'Ticker': [ticker],
-                            'MA1': [ma_period1],
-                            'MA2': [ma_period2],
-                            'RSI': [rsi_period],
-                            'Total Trades': [trade_analysis.total.closed if 'total' in trade_analysis and 'closed' in trade_analysis.total else 0],
-                            'Profitable Trades': [trade_analysis.won.total if 'won' in trade_analysis else 0],
-                            'Losing Trades': [trade_analysis.lost.total if 'lost' in trade_analysis else 0],
-                            'Total Profit/Loss': [int(round(trade_analysis.pnl.net.total)) if 'pnl' in trade_analysis and 'net' in trade_analysis.pnl else 0],
-                            'Profit Percentage': [round((trade_analysis.pnl.net.total / 100000) * 100, 2) if 'pnl' in trade_analysis and 'net' in trade_analysis.pnl else 0],
-                            'Buy Prices': [', '.join(map(str, trades['buy_price'].dropna().tolist()))],
-                            'Sell Prices': [', '.join(map(str, trades['sell_price'].dropna().tolist()))],
-                        })
-
-                        completed_trades.append(trades)
-                    else:
-                        trade_summary = pd.DataFrame({
-                            'Ticker': [ticker],
-                            'MA1': [ma_period1],
-                            'MA2': [ma_period2],
-                            'RSI': [rsi_period],
-                            'Total Trades': [0],
-                            'Profitable Trades': [0],
-                            'Losing Trades': [0],
-                            'Total Profit/Loss': [0],
-                            'Profit Percentage': [0],
-                            'Buy Prices': [''],
-                            'Sell Prices': [''],
-                        })
-
-                    all_trades.append(trade_summary)
-
-                if all_trades:
-                    filename = f'all_trades_report_MA1_{ma_period1}_MA2_{ma_period2}_RSI_{rsi_period}.csv'
-                    all_trades_df = pd.concat(all_trades, ignore_index=True)
-                    all_trades_df.to_csv(filename, index=False)
-                    print(f"All trades report saved to {filename}")
-                else:
-                    print("No trades to report.")
-
-                if completed_trades:
-                    filename = f'completed_trades_report_MA1_{ma_period1}_MA2_{ma_period2}_RSI_{rsi_period}.csv'
-                    completed_trades_df = pd.concat(completed_trades, ignore_index=True)
-                    completed_trades_df.to_csv(filename, index=False)
-                    print(f"Completed trades report saved to {filename}")
-                else:
-                    print("No completed trades to report.")
+        completed_trades.flush()
+        if completed_trades.parts():
+            print(f"Completed trades report saved to {completed_trades_dataset.partition(combination)}")
+        else:
+            print("No completed trades to report.")
 
 if __name__ == '__main__':
     main()
@@ -1,87 +1,18 @@
-import backtrader as bt
-import yfinance as yf
+from stock_analysis.universe import load_universe
+from stock_analysis.strategies import BuyWithRSIAndMovingAverages
+from stock_analysis.panel import load_panel, panel_path
+from stock_analysis.panel_backtest import backtest_panel, PanelBuyWithRSIAndMovingAverages
+from stock_analysis.trade_log import TradeLog
+from stock_analysis.batch import run_batch, summary_row
+from stock_analysis.journal import RunJournal
+from stock_analysis.sizer import MaxCashSizer
 import pandas as pd
+from pathlib import Path
 import os
 
-class BuyWithRSIAndMovingAverages(bt.Strategy):
-    params = (
-        ('ma_period1', 21),
-        ('ma_period2', 36),
-        ('rsi_period', 14),
-    )
+LISTING_FILE = Path(__file__).resolve().parent.parent / 'EQUITY_L.csv'
 
-    def __init__(self):
-        self.ma1 = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.ma_period1)
-        self.ma2 = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.ma_period2)
-        self.rsi = bt.indicators.RelativeStrengthIndex(self.data.close, period=self.params.rsi_period)
-
-        self.buy_signal = bt.indicators.CrossOver(self.ma1, self.ma2)
-        self.buy_prices = []
-        self.sell_prices = []
-        self.stop_loss = None
-        self.target = None
-        self.trades = []
-
-    def next(self):
-        if not self.position:
-            if self.rsi[0] > 60 and self.buy_signal[0] == 1:
-                size = self.broker.get_cash() // self.data.close[0]
-                size = min(size, 30000 // self.data.close[0])
-                if size > 0:
-                    print(f"Buying {size} shares of {self.data._name} at {self.data.close[0]} for a total of {size * self.data.close[0]}")
-                    self.buy(price=self.data.close[0], size=size)
-                    self.buy_prices.append((self.data.datetime.date(0), self.data.close[0]))
-                    self.stop_loss = 0.75 * self.data.close[0]  # Set a stop-loss value if required
-        else:
-            if self.data.close[0] < self.ma2[0]:
-                print(f"Selling {self.position.size} shares of {self.data._name} at {self.data.close[0]}")
-                self.sell(price=self.data.close[0])
-                self.sell_prices.append((self.data.datetime.date(0), self.data.close[0]))
-                self.stop_loss = None
-                self.target = None
-
-    def notify_trade(self, trade):
-        if trade.isclosed:
-            trade_info = {
-                'ticker': trade.data._name,
-                'buy_date': self.buy_prices[-1][0] if self.buy_prices else None,
-                'buy_price': self.buy_prices[-1][1] if self.buy_prices else None,
-                'sell_date': self.sell_prices[-1][0] if self.sell_prices else None,
-                'sell_price': self.sell_prices[-1][1] if self.sell_prices else None,
-                'profit': trade.pnl,
-                'profit_percent': (trade.pnl / trade.price) * 100
-            }
-            self.trades.append(trade_info)
-            print(f'Closed: {trade.data._name}, Profit: {trade.pnl:.2f}, Buy Price: {trade_info["buy_price"]:.2f}, Sell Price: {trade_info["sell_price"]:.2f}')
-
-class MaxCashSizer(bt.Sizer):
-    params = (
-        ('max_cash', 30000),  # Maximum cash to use per trade
-    )
-
-    def _getsizing(self, comminfo, cash, data, isbuy):
-        if isbuy:
-            available_cash = min(self.params.max_cash, cash)
-            size = available_cash // data.close[0]
-            print(f"Calculating size: available_cash = {available_cash}, data.close[0] = {data.close[0]}, size = {size}")
-            return size
-        return self.broker.getposition(data).size
-
-def fetch_data(ticker, start_date, end_date):
-    df = yf.download(ticker, start=start_date, end=end_date, interval='1mo')
-    return df
-
-def get_market_cap(ticker):
-    try:
-        ticker_info = yf.Ticker(ticker).info
-        if ticker_info and 'marketCap' in ticker_info and ticker_info['marketCap'] is not None:
-            return ticker_info['marketCap']
-        else:
-            print(f"Market cap information not available for {ticker}")
-            return None
-    except Exception as e:
-        print(f"Error fetching market cap for {ticker}: {e}")
-        return None
+PANEL_MODE = False  # Backtest every ticker in one array pass (stock_analysis.panel_backtest)
 
 def main():
     start_date = '2005-01-01'
@@ -89,84 +20,48 @@ def main():
     
     equity_file = 'equity_full.csv'
     stocks = pd.read_csv(equity_file)['Ticker'].tolist()
-
-    all_trades = []
-    completed_trades = []
-
-    for ticker in stocks:
-        print(f'Analyzing {ticker}...')
-        market_cap = get_market_cap(f'{ticker}.NS')
-        if market_cap is None or market_cap < 2000000000: #2000 crore
-            print(f"Skipping {ticker} due to low market cap or missing data.")
-            continue
-        
-        df = fetch_data(f'{ticker}.NS', start_date, end_date)
-        if df.empty:
-            print(f"No data for {ticker}. Skipping.")
-            continue
-
-        if len(df) < max(21, 36, 14):
-            print(f"Not enough data for {ticker}. Skipping.")
-            continue
-
-        data = bt.feeds.PandasData(dataname=df)
-
-        cerebro = bt.Cerebro()
-        cerebro.addstrategy(BuyWithRSIAndMovingAverages)
-        cerebro.adddata(data)
-        cerebro.broker.set_cash(100000)
-        cerebro.addsizer(MaxCashSizer)
-
-        cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trade')
-
-        try:
-            result = cerebro.run()
-        except Exception as e:
-            print(f"Error running strategy for {ticker}: {e}")
-            continue
-
-        strategy = result[0]
-        trade_analysis = strategy.analyzers.trade.get_analysis()
-
-        trades = pd.DataFrame(strategy.trades)
-
-        if not trades.empty:
-            trade_summary = pd.DataFrame({
-                'Ticker': [ticker],
-                'Total Trades': [trade_analysis.total.closed if 'total' in trade_analysis and 'closed' in trade_analysis.total else 0],
-                'Profitable Trades': [trade_analysis.won.total if 'won' in trade_analysis else 0],
-                'Losing Trades': [trade_analysis.lost.total if 'lost' in trade_analysis else 0],
-                'Total Profit/Loss': [int(round(trade_analysis.pnl.net.total)) if 'pnl' in trade_analysis and 'net' in trade_analysis.pnl else 0],
-                'Profit Percentage': [round((trade_analysis.pnl.net.total / 100000) * 100, 2) if 'pnl' in trade_analysis and 'net' in trade_analysis.pnl else 0],
-                'Buy Prices': [', '.join(map(str, trades['buy_price'].dropna().tolist()))],
-                'Sell Prices': [', '.join(map(str, trades['sell_price'].dropna().tolist()))],
-            })
-
-            completed_trades.append(trades)
-        else:
-            trade_summary = pd.DataFrame({
-                'Ticker': [ticker],
-                'Total Trades': [0],
-                'Profitable Trades': [0],
-                'Losing Trades': [0],
-                'Total Profit/Loss': [0],
-                'Profit Percentage': [0],
-                'Buy Prices': [''],
-                'Sell Prices': [''],
-            })
-
-        all_trades.append(trade_summary)
-
-    if all_trades:
-        all_trades_df = pd.concat(all_trades, ignore_index=True)
-        all_trades_df.to_csv('all_trades_report.csv', index=False)
+    universe = load_universe(stocks, listing_file=LISTING_FILE)
+    stocks = universe.filter(listed_before=end_date, start=start_date, end=end_date, interval='1mo',
+                             min_bars=max(21, 36, 14),
+                             min_market_cap=2000000000)  # 2000 crore
+
+    # Rows go to disk as tickers finish; the CSV reports are compacted from the logs at the end
+    all_trades = TradeLog('trade_log/all_trades')
+    completed_trades = TradeLog('trade_log/completed_trades')
+
+    if PANEL_MODE:
+        # Whole universe in one array pass instead of a cerebro per ticker
+        universe_name = os.path.splitext(os.path.basename(equity_file))[0]
+        panel = load_panel(stocks, start_date, end_date, interval='1mo', suffix='.NS',
+                           root=panel_path(universe_name, start_date, end_date, interval='1mo'))
+        summary, trades = backtest_panel(panel, PanelBuyWithRSIAndMovingAverages(), tickers=stocks, min_bars=max(21, 36, 14))
+        all_trades.append(summary)
+        completed_trades.append(trades)
+    else:
+        # Finished tickers are journaled, so a rerun after an interruption only runs what is left.
+        # The logs are cleared above and rebuilt from the journal and the new records.
+        journal = RunJournal(f'trade_log/journal_{start_date}_{end_date}_1mo.sqlite')
+        runs = {'rsi_moving_averages': {'strategy': BuyWithRSIAndMovingAverages, 'sizer': MaxCashSizer,
+                                        'min_bars': max(21, 36, 14)}}
+        for records in run_batch(runs, stocks, start_date, end_date, journal=journal):
+            record = records['rsi_moving_averages']
+            ticker = record['ticker']
+            if 'skipped' in record:
+                print(f"{record['skipped']} for {ticker}. Skipping.")
+                continue
+            if 'error' in record:
+                print(f"Error running strategy for {ticker}: {record['error']}")
+                continue
+            all_trades.append([summary_row(record)])
+            completed_trades.append(record['trades'])
+        journal.close()
+
+    if all_trades.compact('all_trades_report.csv'):
         print("All trades report saved to all_trades_report.csv")
     else:
         print("No trades to report.")
 
-    if completed_trades:
-        completed_trades_df = pd.concat(completed_trades, ignore_index=True)
-        completed_trades_df.to_csv('completed_trades_report.csv', index=False)
+    if completed_trades.compact('completed_trades_report.csv'):
         print("Completed trades report saved to completed_trades_report.csv")
     else:
         print("No completed trades to report.")
@@ -1,46 +1,12 @@
 import backtrader as bt
-import yfinance as yf
+from stock_analysis.data_fetcher import fetch_data as fetch_stored_data
+from stock_analysis.universe import load_universe
+from stock_analysis.strategies import SupertrendStrategy
+from stock_analysis.trade_log import TradeLog
 import pandas as pd
+from pathlib import Path
 
-class Supertrend(bt.Indicator):
-    lines = ('supertrend', 'direction',)
-    params = (
-        ('period', 7),
-        ('multiplier', 3),
-    )
-
-    def __init__(self):
-        self.addminperiod(self.params.period)
-        atr = bt.indicators.ATR(self.data, period=self.params.period)
-        hl2 = (self.data.high + self.data.low) / 2
-        self.lines.supertrend = bt.If(self.data.close > (hl2 - (self.params.multiplier * atr)),
-                                      hl2 + (self.params.multiplier * atr),
-                                      hl2 - (self.params.multiplier * atr))
-
-    def next(self):
-        if self.data.close[0] > self.lines.supertrend[0]:
-            self.lines.direction[0] = 1
-        elif self.data.close[0] < self.lines.supertrend[0]:
-            self.lines.direction[0] = -1
-
-class SupertrendStrategy(bt.Strategy):
-    params = (
-        ('period', 7),
-        ('multiplier', 3),
-    )
-
-    def __init__(self):
-        self.supertrend = Supertrend(self.data, period=self.params.period, multiplier=self.params.multiplier)
-
-    def next(self):
-        if not self.position:
-            if self.supertrend.direction[0] == 1:
-                size = self.broker.get_cash() // self.data.close[0]
-                size = min(size, 30000 // self.data.close[0])
-                if size > 0:
-                    self.buy(size=size)
-        elif self.supertrend.direction[0] == -1:
-            self.sell()
+LISTING_FILE = Path(__file__).resolve().parent.parent / 'EQUITY_L.csv'
 
 class MaxCashSizer(bt.Sizer):
     params = (
@@ -55,36 +21,24 @@ class MaxCashSizer(bt.Sizer):
         return self.broker.getposition(data).size
 
 def fetch_data(ticker, start_date, end_date):
-    df = yf.download(ticker, start=start_date, end=end_date, interval='1mo')
-    df.rename(columns={'Adj Close': 'close'}, inplace=True)  # Ensure compatibility with Backtrader
+    df = fetch_stored_data(ticker, start_date, end_date, interval='1mo', adjusted=True)  # Split/dividend adjusted OHLC
     return df
 
-def get_market_cap(ticker):
-    try:
-        ticker_info = yf.Ticker(ticker).info
-        if ticker_info and 'marketCap' in ticker_info and ticker_info['marketCap'] is not None:
-            return ticker_info['marketCap']
-        else:
-            return None
-    except Exception as e:
-        return None
-
 def main():
     start_date = '2005-01-01'
     end_date = '2024-06-14'
     
     equity_file = '../equity.csv'
     stocks = pd.read_csv(equity_file)['Ticker'].tolist()
+    universe = load_universe(stocks, listing_file=LISTING_FILE)
+    stocks = universe.filter(listed_before=end_date, start=start_date, end=end_date, interval='1mo',
+                             min_market_cap=2000000000)  # 2000 crore
 
-    all_trades = []
+    # Trades go to disk as tickers finish; the reports are built from the log at the end
+    all_trades = TradeLog('trade_log/all_trades_detailed')
 
     for ticker in stocks:
         print(f'Analyzing {ticker}...')
-        market_cap = get_market_cap(f'{ticker}.NS')
-        if market_cap is None or market_cap < 2000000000:  # 2000 crore
-            print(f"Skipping {ticker} due to low market cap or missing data.")
-            continue
-        
         df = fetch_data(f'{ticker}.NS', start_date, end_date)
         if df.empty:
             print(f"No data for {ticker}. Skipping.")
@@ -94,7 +48,7 @@ def main():
 
         cerebro = bt.Cerebro()
         cerebro.addstrategy(SupertrendStrategy)
-        cerebro.adddata(data)
+        cerebro.adddata(data, name=ticker)
         cerebro.broker.set_cash(100000)
         cerebro.addsizer(MaxCashSizer)
 
@@ -110,6 +64,7 @@ def main():
         trades = strategy.analyzers.trade.get_analysis()
 
         if trades['total']['total'] > 0:
+            ticker_trades = []
             for i in range(trades['total']['total']):
                 trade_info = {
                     'Ticker': ticker,
@@ -121,11 +76,11 @@ def main():
                     'Profit': trades['trades'][i]['pnl'],
                     'Profit Percent': trades['trades'][i]['pnlcomm']
                 }
-                all_trades.append(trade_info)
+                ticker_trades.append(trade_info)
+            all_trades.append(ticker_trades)
 
-    if all_trades:
-        all_trades_df = pd.DataFrame(all_trades)
-        all_trades_df.to_csv('all_trades_detailed.csv', index=False)
+    if all_trades.compact('all_trades_detailed.csv'):
+        all_trades_df = all_trades.read(columns=['Ticker', 'Profit'])
         
         # Summary statistics
         total_trades = len(all_trades_df)
@@ -1,5 +1,6 @@
 import backtrader as bt
-import yfinance as yf
+from stock_analysis.data_fetcher import fetch_data as fetch_stored_data
+from stock_analysis.clean import fill_calendar
 import pandas as pd
 from datetime import datetime
 import calendar
@@ -64,9 +65,8 @@ class MaxCashSizer(bt.Sizer):
         return self.broker.getposition(data).size
 
 def fetch_data(ticker, start_date, end_date):
-    data = yf.download(ticker, start=start_date, end=end_date, interval='1d')
-    all_dates = pd.date_range(start=start_date, end=end_date, freq='B')
-    data = data.reindex(all_dates, fill_value=0)
+    data = fetch_stored_data(ticker, start_date, end_date, interval='1d')
+    data = fill_calendar(data, start_date, end_date, freq='B')
     return data
 
 class TradingPipeline:
@@ -80,7 +80,12 @@ class TradingPipeline:
         self.cerebro.addsizer(MaxCashSizer)
 
     def fetch_all_data(self):
-        return {ticker: fetch_data(f'{ticker}.NS', self.start_date, self.end_date) for ticker in self.stocks if not fetch_data(f'{ticker}.NS', self.start_date, self.end_date).empty and len(fetch_data(f'{ticker}.NS', self.start_date, self.end_date)) >= EMA_PERIOD}
+        all_data = {}
+        for ticker in self.stocks:
+            df = fetch_data(f'{ticker}.NS', self.start_date, self.end_date)
+            if not df.empty and len(df) >= EMA_PERIOD:
+                all_data[ticker] = df
+        return all_data
 
     def process_month(self, date):
         month_end = date + pd.DateOffset(days=calendar.monthrange(date.year, date.month)[1] - 1)
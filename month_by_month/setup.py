@@ -10,10 +10,12 @@ setup(
         'backtrader',
         'yfinance',
         'pandas',
+        'pyarrow',
     ],
     entry_points={
         'console_scripts': [
             'stock_trading = stock_trading.main:main',
+            'stock_ingest = stock_analysis.ingest:main',
         ],
     },
 )
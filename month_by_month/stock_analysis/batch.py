@@ -0,0 +1,131 @@
+# stock_trading/batch.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+from .data_fetcher import fetch_data
+from .journal import run_context
+from .sweep import run_one
+from .trade_log import TradeLog
+
+# Several strategies over one universe in a single pass. A worker fetches and cleans a
+# ticker's bars once per price basis (raw or split/dividend adjusted), runs every strategy on
+# them, and the strategies share indicators through the indicator cache, so adding a strategy
+# costs only its own run. Work is split by ticker on a process pool like sweep.run_sweep.
+
+_config = None
+
+def _init_worker(config):
+    global _config
+    _config = config
+
+def _run_ticker(ticker, names=None):
+    # {name: record} for one ticker, of every run or those in names, records as in sweep:
+    # ticker, params and either trades/summary, an error message, or a skip reason
+    config = _config
+    frames = {}
+    records = {}
+    for name, run in config['runs'].items():
+        if names is not None and name not in names:
+            continue
+        adjusted = run.get('adjusted', False)
+        if adjusted not in frames:
+            frames[adjusted] = fetch_data(f"{ticker}{config['suffix']}", config['start_date'], config['end_date'],
+                                          interval=config['interval'], adjusted=adjusted)
+        df = frames[adjusted]
+        params = run.get('params', {})
+        record = {'ticker': ticker, 'params': params}
+        if df.empty:
+            record['skipped'] = 'No data'
+        elif len(df) < run.get('min_bars', 0):
+            record['skipped'] = 'Not enough data'
+        else:
+            try:
+                record['trades'], record['summary'] = run_one(run['strategy'], params, df, ticker,
+                                                              sizer=run.get('sizer'), cash=config['cash'])
+            except Exception as e:
+                record['error'] = str(e)
+        records[name] = record
+    return records
+
+def run_batch(runs, tickers, start_date, end_date, interval='1mo', suffix='.NS', cash=100000, workers=None,
+              journal=None):
+    # runs maps a report name to {'strategy': cls, 'params': {...}, 'sizer': cls, 'adjusted': bool,
+    # 'min_bars': n}; only strategy is required. Yields each ticker's {name: record}, in ticker
+    # order. Strategies and sizers must be importable by the workers (stock_analysis.strategies).
+    # With a journal.RunJournal, runs already finished for a ticker with the same dates,
+    # interval, suffix, cash and adjusted flag are replayed from it under their report name, and
+    # each ticker's new records are journaled as it completes.
+    config = {'runs': dict(runs), 'start_date': start_date, 'end_date': end_date, 'interval': interval,
+              'suffix': suffix, 'cash': cash}
+    tickers = list(tickers)
+    if journal is None:
+        pending = [None] * len(tickers)
+    else:
+        keys = {name: journal.params_key(run.get('params', {}),
+                                         run_context(start_date, end_date, interval, suffix, cash,
+                                                     adjusted=run.get('adjusted', False)))
+                for name, run in config['runs'].items()}
+        done = {name: journal.finished(name) for name in keys}
+        pending = [[name for name, key in keys.items() if (key, ticker) not in done[name]] for ticker in tickers]
+    for ticker, names, records in zip(tickers, pending, _map_tickers(config, tickers, pending, workers)):
+        if journal is not None:
+            journal.record((name, keys[name], record) for name, record in records.items())
+            replayed = {name: journal.replay(name, ticker)[key] for name, key in keys.items() if name not in records}
+            records = {name: records[name] if name in records else replayed[name] for name in keys}
+        yield records
+
+def _map_tickers(config, tickers, pending, workers):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(config)
+        for ticker, names in zip(tickers, pending):
+            yield _run_ticker(ticker, names)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config,)) as executor:
+        yield from executor.map(_run_ticker, tickers, pending)
+
+def summary_row(record, cash=100000):
+    # The stock-by-stock scripts' all-trades-report row for a record that ran
+    trades = pd.DataFrame(record['trades'])
+    summary = record['summary']
+    if trades.empty:
+        return {'Ticker': record['ticker'], 'Total Trades': 0, 'Profitable Trades': 0, 'Losing Trades': 0,
+                'Total Profit/Loss': 0, 'Profit Percentage': 0, 'Buy Prices': '', 'Sell Prices': ''}
+    return {
+        'Ticker': record['ticker'],
+        'Total Trades': summary['closed'],
+        'Profitable Trades': summary['won'],
+        'Losing Trades': summary['lost'],
+        'Total Profit/Loss': int(round(summary['pnl_net'])) if summary['pnl_net'] is not None else 0,
+        'Profit Percentage': round((summary['pnl_net'] / cash) * 100, 2) if summary['pnl_net'] is not None else 0,
+        'Buy Prices': ', '.join(map(str, trades['buy_price'].dropna().tolist())),
+        'Sell Prices': ', '.join(map(str, trades['sell_price'].dropna().tolist())),
+    }
+
+class BatchReports:
+    # Collects run_batch() output into each strategy's all-trades and completed-trades reports,
+    # logged to disk as tickers finish and compacted into CSVs by save()
+    def __init__(self, names, cash=100000, directory='.'):
+        self.cash = cash
+        self.directory = directory
+        self.rows = {name: TradeLog(os.path.join(directory, 'trade_log', f'{name}_all_trades')) for name in names}
+        self.trades = {name: TradeLog(os.path.join(directory, 'trade_log', f'{name}_completed_trades')) for name in names}
+
+    def add(self, records):
+        for name, record in records.items():
+            if 'skipped' in record:
+                print(f"{name}: {record['skipped']} for {record['ticker']}. Skipping.")
+                continue
+            if 'error' in record:
+                print(f"{name}: Error running strategy for {record['ticker']}: {record['error']}")
+                continue
+            self.rows[name].append([summary_row(record, self.cash)])
+            self.trades[name].append(record['trades'])
+
+    def save(self):
+        for name in self.rows:
+            tickers = self.rows[name].compact(os.path.join(self.directory, f'{name}_all_trades_report.csv'))
+            self.trades[name].compact(os.path.join(self.directory, f'{name}_completed_trades_report.csv'))
+            print(f"{name}: {tickers} tickers, reports saved to {self.directory}")
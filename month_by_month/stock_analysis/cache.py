@@ -0,0 +1,57 @@
+# stock_trading/cache.py
+
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+FETCH_CACHE_BYTES = 256 * 2 ** 20
+
+class FetchCache:
+    # In-process memo in front of the store. One frame is kept per (ticker, interval)
+    # together with the (start, end) range it was fetched for; any request inside that
+    # range is answered by slicing, and concurrent requests for the same key wait on a
+    # per-key lock instead of downloading twice. The least recently used frames are dropped
+    # once their total size passes max_bytes, so a scan over a whole universe does not keep
+    # every ticker's bars; the store still has them.
+    def __init__(self, fetch, max_bytes=FETCH_CACHE_BYTES):
+        self.fetch = fetch
+        self.max_bytes = max_bytes
+        self.frames = OrderedDict()
+        self.nbytes = 0
+        self.key_locks = {}
+        self.lock = threading.Lock()
+
+    def _key_lock(self, key):
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def get(self, ticker, start_date, end_date, interval='1d'):
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        key = (ticker, interval)
+        with self._key_lock(key):
+            with self.lock:
+                cached = self.frames.get(key)
+            if cached is None or start < cached[0] or end > cached[1]:
+                fetch_start, fetch_end = start, end
+                if cached is not None:
+                    fetch_start, fetch_end = min(start, cached[0]), max(end, cached[1])
+                df = self.fetch(ticker, fetch_start, fetch_end, interval=interval)
+                cached = (fetch_start, fetch_end, df, int(df.memory_usage(deep=True).sum()))
+            with self.lock:
+                replaced = self.frames.get(key)
+                if replaced is not cached:
+                    self.nbytes += cached[3] - (replaced[3] if replaced is not None else 0)
+                self.frames[key] = cached
+                self.frames.move_to_end(key)
+                while self.nbytes > self.max_bytes and len(self.frames) > 1:
+                    _, evicted = self.frames.popitem(last=False)
+                    self.nbytes -= evicted[3]
+        df = cached[2]
+        if df.empty:
+            return df
+        return df.loc[(df.index >= start) & (df.index < end)]
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+            self.nbytes = 0
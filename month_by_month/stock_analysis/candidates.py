@@ -0,0 +1,64 @@
+# stock_trading/candidates.py
+
+import os
+import numpy as np
+import pandas as pd
+
+def factor_values(panel, factor, positions):
+    # ticker x len(positions) ranking values: a panel field, 'Turnover' (close * volume),
+    # a ticker x date array on the panel's date grid, or a function of the panel returning one
+    if callable(factor):
+        factor = factor(panel)
+    if isinstance(factor, str):
+        if factor == 'Turnover':
+            return panel.values[:, positions, panel.field_index['Close']] * panel.values[:, positions, panel.field_index['Volume']]
+        return panel.values[:, positions, panel.field_index[factor]]
+    return np.asarray(factor)[:, positions]
+
+class CandidateIndex:
+    # Screen hits for every rebalance date, ranked by a factor, in a date-major CSR layout:
+    # the candidates of dates[k] are tickers[offsets[k]:offsets[k + 1]], best first, so the
+    # top N of a date is a slice. Ties keep the panel's ticker order, like a stable sort.
+    def __init__(self, dates, offsets, tickers, keys, names):
+        self.dates = pd.DatetimeIndex(dates, name='Date')
+        self.offsets = offsets
+        self.tickers = tickers
+        self.keys = keys
+        self.names = names
+        self.date_index = {date: k for k, date in enumerate(self.dates)}
+
+    @classmethod
+    def build(cls, panel, screen, dates, factor='Volume'):
+        # screen is the ticker x date bool array on the panel's grid; dates the panel does not
+        # have (no bar on that day) get no candidates
+        dates = pd.DatetimeIndex(dates)
+        positions = panel.dates.get_indexer(dates)
+        dates, positions = dates[positions >= 0], positions[positions >= 0]
+        values = factor_values(panel, factor, positions)
+
+        ticker, date = np.nonzero(screen[:, positions])
+        keys = values[ticker, date]
+        order = np.lexsort((ticker, -keys, date))
+        offsets = np.searchsorted(date[order], np.arange(len(dates) + 1))
+        return cls(dates, offsets, ticker[order], keys[order], list(panel.tickers))
+
+    @classmethod
+    def open(cls, path):
+        with np.load(path, allow_pickle=False) as stored:
+            return cls(stored['dates'], stored['offsets'], stored['tickers'], stored['keys'], stored['names'].tolist())
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez(path, dates=self.dates.to_numpy(), offsets=self.offsets, tickers=self.tickers,
+                 keys=self.keys, names=np.array(self.names))
+
+    def ranked(self, date):
+        # (ticker positions, keys) of every candidate on date, best first
+        k = self.date_index.get(pd.Timestamp(date))
+        if k is None:
+            return self.tickers[:0], self.keys[:0]
+        return self.tickers[self.offsets[k]:self.offsets[k + 1]], self.keys[self.offsets[k]:self.offsets[k + 1]]
+
+    def top(self, date, n):
+        tickers, _ = self.ranked(date)
+        return [self.names[i] for i in tickers[:n]]
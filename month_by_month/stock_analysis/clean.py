@@ -0,0 +1,80 @@
+# stock_trading/clean.py
+
+import numpy as np
+import pandas as pd
+
+CLEAN_VERSION = 2
+RAW_FIELDS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+ADJUSTED_FIELDS = {'Adj Open': 'Open', 'Adj High': 'High', 'Adj Low': 'Low', 'Adj Close': 'Close', 'Volume': 'Volume'}
+
+def clean_ohlcv(df):
+    # Validates and normalizes a raw OHLCV frame. Returns the cleaned frame and a dict
+    # counting what was fixed. Bars without a usable close are dropped rather than zero
+    # filled, since zero prices break sizing (cash // close) and every moving average after them.
+    report = {'rows': len(df), 'unsorted': 0, 'duplicate_dates': 0, 'bad_close': 0, 'repaired_bars': 0}
+    if df.empty:
+        return df, report
+
+    df = df[df.index.notna()]
+    if not df.index.is_monotonic_increasing:
+        report['unsorted'] = 1
+        df = df.sort_index(kind='stable')
+    duplicated = df.index.duplicated(keep='last')
+    report['duplicate_dates'] = int(duplicated.sum())
+    df = df[~duplicated]
+
+    close = df['Close'].to_numpy(dtype='float64')
+    bad_close = ~(close > 0)
+    report['bad_close'] = int(bad_close.sum())
+    df = df[~bad_close].copy()
+    close = close[~bad_close]
+
+    open_ = df['Open'].to_numpy(dtype='float64')
+    high = df['High'].to_numpy(dtype='float64')
+    low = df['Low'].to_numpy(dtype='float64')
+    open_fixed = np.where(open_ > 0, open_, close)
+    high_fixed = np.fmax(np.where(high > 0, high, np.nan), np.maximum(open_fixed, close))
+    low_fixed = np.fmin(np.where(low > 0, low, np.nan), np.minimum(open_fixed, close))
+    report['repaired_bars'] = int(((open_fixed != open_) | (high_fixed != high) | (low_fixed != low)).sum())
+    df['Open'], df['High'], df['Low'] = open_fixed, high_fixed, low_fixed
+
+    if 'Adj Close' in df.columns:
+        adj_close = df['Adj Close'].to_numpy(dtype='float64')
+        df['Adj Close'] = np.where(adj_close > 0, adj_close, close)
+    else:
+        df['Adj Close'] = close
+    if 'Volume' in df.columns:
+        df['Volume'] = df['Volume'].fillna(0)
+
+    # Split/dividend adjusted OHLC, stored next to the raw prices so no run has to rebuild it
+    factor = df['Adj Close'].to_numpy() / close
+    df['Adj Open'], df['Adj High'], df['Adj Low'] = open_fixed * factor, high_fixed * factor, low_fixed * factor
+    return df, report
+
+def select_prices(df, adjusted=False):
+    # OHLCV on the requested price basis, with the usual column names so backtrader and the
+    # screens do not care which one they got
+    if df.empty:
+        return df
+    if not adjusted:
+        return df[[field for field in RAW_FIELDS if field in df.columns]]
+    return df[list(ADJUSTED_FIELDS)].rename(columns=ADJUSTED_FIELDS)
+
+def fill_calendar(df, start_date, end_date, freq='B'):
+    # Puts a cleaned frame on a regular calendar from its first bar on. Prices carry the
+    # last close forward and volume is 0, so no zero prices are created and nothing is
+    # invented before listing.
+    if df.empty:
+        return df
+    dates = pd.date_range(start=max(pd.Timestamp(start_date), df.index[0]), end=end_date, freq=freq, name=df.index.name)
+    filled = df.reindex(dates)
+    filled['Close'] = filled['Close'].ffill()
+    for field in ('Open', 'High', 'Low'):
+        filled[field] = filled[field].fillna(filled['Close'])
+    if 'Adj Close' in filled.columns:
+        filled['Adj Close'] = filled['Adj Close'].ffill()
+        for field in ('Adj Open', 'Adj High', 'Adj Low'):
+            if field in filled.columns:
+                filled[field] = filled[field].fillna(filled['Adj Close'])
+    filled['Volume'] = filled['Volume'].fillna(0)
+    return filled
@@ -0,0 +1,142 @@
+# stock_trading/crossover_sweep.py
+
+import copy
+import itertools
+import numpy as np
+import pandas as pd
+
+from .indicators import crossover, sma
+from .panel_backtest import Bars, simulate, scan
+
+# MovingCrossOver's fast x slow SMA grid in one pass. Each SMA period is computed once for
+# the whole universe and shared by the pairs that use it, every (fast, slow) pair becomes its
+# own column of the bar array, and the panel backtest runs all of them at once, each pair of
+# each ticker with its own account as in a cerebro run. crossover_signals() scans the same columns for entries only.
+
+def sma_table(close, periods):
+    # {period: SMA} for bar x ticker closes. Each window is summed exactly like backtrader's
+    # math.fsum (indicators.sma): differencing a running cumsum leaves ~1e-12 noise where
+    # fast and slow should be equal on flat prices, which crossover() would read as crossings.
+    return {period: sma(close, period) for period in periods}
+
+class PairCrossover:
+    # MovingAverageCrossover for every (fast, slow) pair: columns are pair-major, so column
+    # k * n_tickers + i is pair k on ticker i
+    def __init__(self, pairs, n_tickers):
+        self.pairs = pairs
+        self.n_tickers = n_tickers
+
+    def prepare(self, bars):
+        periods = sorted({period for pair in self.pairs for period in pair})
+        table = sma_table(bars.close[:, :self.n_tickers], periods)
+        fast = np.concatenate([table[fast] for fast, _ in self.pairs], axis=1)
+        slow = np.concatenate([table[slow] for _, slow in self.pairs], axis=1)
+        self.crossover = crossover(fast, slow)
+        self.minperiod = np.repeat([max(pair) + 1 for pair in self.pairs], self.n_tickers)
+        self.skip = np.zeros(bars.close.shape[1], dtype=bool)
+
+    def entry(self, bars, i):
+        return self.crossover[i] > 0
+
+    def exit(self, bars, i, signal_close):
+        return self.crossover[i] < 0
+
+def tile_bars(bars, count):
+    # The same bars repeated count times side by side, one copy per pair
+    tiled = copy.copy(bars)
+    for field in ('open', 'close', 'date_rows'):
+        if hasattr(bars, field):
+            setattr(tiled, field, np.tile(getattr(bars, field), count))
+    tiled.lengths = np.tile(bars.lengths, count)
+    tiled.tickers = bars.tickers * count
+    return tiled
+
+SWEEP_COLUMNS = ['ticker', 'buy_date', 'buy_price', 'sell_date', 'sell_price', 'profit', 'profit_percent',
+                 'Ticker', 'Fast Period', 'Slow Period']
+SIGNAL_COLUMNS = ['Buy Date', 'Buy Price', 'Ticker', 'Fast Period', 'Slow Period']
+
+def crossover_sweep_chunks(panel, fast_periods, slow_periods, tickers=None, min_bars=0, cash=100000,
+                           max_cash=30000, chunk_size=200):
+    # Completed trades of every (fast, slow) pair, one frame per chunk_size tickers as each
+    # finishes, in the layout of MovingCrossOver/hyperparameter.py's detailed report: ticker by
+    # ticker, pairs in grid order within a ticker
+    pairs = list(itertools.product(fast_periods, slow_periods))
+    tickers = [ticker for ticker in (panel.tickers if tickers is None else tickers) if ticker in panel.ticker_index]
+    for start in range(0, len(tickers), chunk_size):
+        bars = Bars(panel, tickers[start:start + chunk_size], fields=('Open', 'Close'))
+        keep = bars.lengths >= max(min_bars, 1)
+        n = len(bars.tickers)
+        tiled = tile_bars(bars, len(pairs))
+        column, buy_bar, sell_bar, pnl, trade_price = simulate(tiled, PairCrossover(pairs, n), cash, max_cash)
+        pair, ticker = column // n, column % n
+        selected = keep[ticker]
+        column, buy_bar, sell_bar, pnl, trade_price, pair, ticker = (
+            part[selected] for part in (column, buy_bar, sell_bar, pnl, trade_price, pair, ticker))
+        order = np.lexsort((pair, ticker))
+        column, buy_bar, sell_bar, pnl, trade_price, pair, ticker = (
+            part[order] for part in (column, buy_bar, sell_bar, pnl, trade_price, pair, ticker))
+        names = [bars.tickers[i] for i in ticker]
+        yield pd.DataFrame({
+            'ticker': names,
+            'buy_date': [tiled.date(bar, c) for bar, c in zip(buy_bar, column)],
+            'buy_price': tiled.close[buy_bar, column],
+            'sell_date': [tiled.date(bar, c) for bar, c in zip(sell_bar, column)],
+            'sell_price': tiled.close[sell_bar, column],
+            'profit': pnl,
+            'profit_percent': pnl / trade_price * 100,
+            'Ticker': names,
+            'Fast Period': [pairs[k][0] for k in pair],
+            'Slow Period': [pairs[k][1] for k in pair],
+        })
+
+def crossover_sweep(panel, fast_periods, slow_periods, **kwargs):
+    # crossover_sweep_chunks() as one frame
+    frames = list(crossover_sweep_chunks(panel, fast_periods, slow_periods, **kwargs))
+    if not frames:
+        return pd.DataFrame(columns=SWEEP_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+def crossover_signal_chunks(panel, fast_periods, slow_periods, tickers=None, min_bars=0, chunk_size=200):
+    # Every bar where the fast SMA crosses above the slow one, for every pair, without a broker,
+    # one frame per chunk_size tickers: MovingCrossOver/just_buy_trades.py's signal report,
+    # ticker by ticker, pairs in grid order
+    pairs = list(itertools.product(fast_periods, slow_periods))
+    tickers = [ticker for ticker in (panel.tickers if tickers is None else tickers) if ticker in panel.ticker_index]
+    for start in range(0, len(tickers), chunk_size):
+        bars = Bars(panel, tickers[start:start + chunk_size], fields=('Close',))
+        n = len(bars.tickers)
+        tiled = tile_bars(bars, len(pairs))
+        bar, column = scan(tiled, PairCrossover(pairs, n))
+        pair, ticker = column // n, column % n
+        selected = bars.lengths[ticker] >= max(min_bars, 1)
+        bar, column, pair, ticker = (part[selected] for part in (bar, column, pair, ticker))
+        order = np.lexsort((bar, pair, ticker))
+        bar, column, pair, ticker = (part[order] for part in (bar, column, pair, ticker))
+        yield pd.DataFrame({
+            'Buy Date': [tiled.date(b, c) for b, c in zip(bar, column)],
+            'Buy Price': tiled.close[bar, column],
+            'Ticker': [bars.tickers[i] for i in ticker],
+            'Fast Period': [pairs[k][0] for k in pair],
+            'Slow Period': [pairs[k][1] for k in pair],
+        })
+
+def crossover_signals(panel, fast_periods, slow_periods, **kwargs):
+    # crossover_signal_chunks() as one frame
+    frames = list(crossover_signal_chunks(panel, fast_periods, slow_periods, **kwargs))
+    if not frames:
+        return pd.DataFrame(columns=SIGNAL_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+def pair_statistics(trades):
+    # The per-pair table MovingCrossOver/analysis.ipynb builds from the detailed trades
+    stats = trades.groupby(['Fast Period', 'Slow Period']).agg(
+        total_profit=('profit', 'sum'),
+        mean_profit=('profit', 'mean'),
+        median_profit=('profit', 'median'),
+        min_profit=('profit', 'min'),
+        max_profit=('profit', 'max'),
+        total_trades=('profit', 'count'),
+        profitable_trades=('profit', lambda x: (x > 0).sum())
+    ).reset_index()
+    stats['percentage_profitable'] = (stats['profitable_trades'] / stats['total_trades']) * 100
+    return stats
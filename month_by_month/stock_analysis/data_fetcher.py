@@ -1,7 +1,18 @@
 # stock_trading/data_fetcher.py
 
-import yfinance as yf
+import pandas as pd
 
-def fetch_data(ticker, start_date, end_date):
-    df = yf.download(ticker, start=start_date, end=end_date, interval='1d')
-    return df
+from .store import OHLCVStore
+from .cache import FetchCache
+from .clean import select_prices
+
+store = OHLCVStore()
+cache = FetchCache(store.fetch)
+
+def fetch_data(ticker, start_date, end_date, interval='1d', adjusted=False):
+    try:
+        df = cache.get(ticker, start_date, end_date, interval=interval)
+    except Exception as e:
+        print(f"Error fetching data for {ticker}: {e}")
+        return pd.DataFrame()
+    return select_prices(df, adjusted=adjusted)
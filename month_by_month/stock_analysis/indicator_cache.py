@@ -0,0 +1,167 @@
+# stock_trading/indicator_cache.py
+
+import threading
+from array import array as typed_array
+from collections import OrderedDict
+import numpy as np
+import backtrader as bt
+
+from .indicators import sma, ema, rsi, atr, supertrend, consolidation
+
+INDICATOR_CACHE_BYTES = 256 * 2 ** 20
+
+class IndicatorCache:
+    # In-process LRU of computed indicator arrays keyed by (ticker, indicator, params, field, span).
+    # span pins the bars the array was computed on (count, first and last bar, first close), so
+    # a run on a different date range, or on adjusted instead of raw prices, recomputes instead
+    # of reading someone else's values. The least recently used arrays are dropped once their
+    # total size passes max_bytes.
+    def __init__(self, max_bytes=INDICATOR_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = compute()
+        size = sum(np.asarray(part).nbytes for part in value) if isinstance(value, tuple) else value.nbytes
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = value
+                self.nbytes += size
+            while self.nbytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= sum(np.asarray(part).nbytes for part in evicted) if isinstance(evicted, tuple) else evicted.nbytes
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+indicator_cache = IndicatorCache()
+
+def line_values(data, field):
+    # The whole preloaded series of one of the feed's lines
+    values = np.asarray(getattr(data, field).array, dtype='float64')
+    if not len(values):
+        raise ValueError('Cached indicators need preloaded data (cerebro preload=True)')
+    return values
+
+def data_span(data):
+    # (count, first and last bar, first close) of the feed, the part of a cache key that pins
+    # its bars. Split/dividend adjustment scales every bar before the last corporate action,
+    # so the first close tells adjusted bars from raw ones over the same dates.
+    dates = data.datetime.array
+    return (len(dates), dates[0], dates[-1], data.close.array[0]) if len(dates) else (0,)
+
+INDICATORS = {
+    'sma': lambda data, field, period: sma(line_values(data, field), period),
+    'ema': lambda data, field, period: ema(line_values(data, field), period),
+    'rsi': lambda data, field, period: rsi(line_values(data, field), period),
+    'atr': lambda data, field, period: atr(line_values(data, 'high'), line_values(data, 'low'),
+                                           line_values(data, 'close'), period),
+}
+
+def copy_values(line, values, start, end):
+    # once() body: one slice assignment into the line's array('d') instead of a Python loop, so
+    # replaying a cached array costs about a memcpy. A feed shorter than the minimum period
+    # still gets one call past its last bar, hence the clip.
+    end = min(end, len(values))
+    if start < end:
+        line.array[start:end] = typed_array('d', np.ascontiguousarray(values[start:end], dtype='float64').tobytes())
+
+class CachedIndicator(bt.Indicator):
+    # Replays a precomputed array aligned with the feed's bars. The minimum period is taken
+    # from the leading NaNs, so indicators built on top (CrossOver, ...) start where they
+    # would on the backtrader indicator the array replaces.
+    lines = ('value',)
+    params = (('values', None),)
+
+    def __init__(self):
+        valid = ~np.isnan(self.p.values)
+        self.addminperiod(int(valid.argmax()) + 1 if valid.any() else len(self.p.values) + 1)
+
+    def next(self):
+        self.lines.value[0] = self.p.values[len(self) - 1]
+
+    def once(self, start, end):
+        copy_values(self.lines.value, self.p.values, start, end)
+
+def cached_indicator(data, name, period, field='close', cache=None):
+    # Drop-in for bt.indicators.SimpleMovingAverage / ExponentialMovingAverage /
+    # RelativeStrengthIndex / ATR inside a strategy's __init__. The feed needs a name
+    # (cerebro.adddata(data, name=ticker)) since that is what the cache is keyed on.
+    cache = cache or indicator_cache
+    key = (data._name, name, (period,), 'hlc' if name == 'atr' else field, data_span(data))
+    values = cache.get(key, lambda: INDICATORS[name](data, field, period))
+    if name == 'rsi':
+        values, zero_division = values
+        if zero_division:
+            # bt.indicators.RelativeStrengthIndex fails the run the same way
+            raise ZeroDivisionError('float division by zero')
+    return CachedIndicator(data, values=values)
+
+class Supertrend(bt.Indicator):
+    # indicators.supertrend() as a backtrader indicator: the ratcheting bands and the trend are
+    # computed for the whole feed in one array pass and shared through the cache, so a
+    # (period, multiplier) sweep over a ticker computes each combination once. Needs a named,
+    # preloaded feed like cached_indicator().
+    lines = ('supertrend', 'direction',)
+    params = (
+        ('period', 7),
+        ('multiplier', 3),
+        ('cache', None),
+    )
+
+    def __init__(self):
+        cache = self.p.cache or indicator_cache
+        key = (self.data._name, 'supertrend', (self.p.period, self.p.multiplier), 'hlc', data_span(self.data))
+        self.values = cache.get(key, lambda: supertrend(line_values(self.data, 'high'), line_values(self.data, 'low'),
+                                                        line_values(self.data, 'close'), self.p.period, self.p.multiplier))
+        valid = ~np.isnan(self.values[0])
+        self.addminperiod(int(valid.argmax()) + 1 if valid.any() else len(valid) + 1)
+
+    def next(self):
+        i = len(self) - 1
+        self.lines.supertrend[0] = self.values[0][i]
+        self.lines.direction[0] = self.values[1][i]
+
+    def once(self, start, end):
+        copy_values(self.lines.supertrend, self.values[0], start, end)
+        copy_values(self.lines.direction, self.values[1], start, end)
+
+class Consolidation(bt.Indicator):
+    # indicators.consolidation() as a backtrader indicator: the highest and lowest close of the
+    # last window bars and a 1/0 flag for the bar's high and low sitting inside that range,
+    # from one pass over the feed whatever the window. Needs a named, preloaded feed.
+    lines = ('range_high', 'range_low', 'in_range',)
+    params = (
+        ('window', 66),
+        ('cache', None),
+    )
+
+    def __init__(self):
+        cache = self.p.cache or indicator_cache
+        key = (self.data._name, 'consolidation', (self.p.window,), 'hlc', data_span(self.data))
+        self.values = cache.get(key, lambda: consolidation(line_values(self.data, 'high'), line_values(self.data, 'low'),
+                                                           line_values(self.data, 'close'), self.p.window))
+        self.addminperiod(self.p.window)
+
+    def next(self):
+        i = len(self) - 1
+        for line, values in zip(self.lines, self.values):
+            line[0] = values[i]
+
+    def once(self, start, end):
+        for line, values in zip(self.lines, self.values):
+            copy_values(line, values, start, end)
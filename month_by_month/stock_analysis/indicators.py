@@ -0,0 +1,186 @@
+# stock_trading/indicators.py
+
+import math
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# backtrader's SMA, EMA, RSI, ATR and CrossOver, plus a Supertrend on that ATR and rolling
+# close ranges, over bar x ticker arrays (axis 0 is time), so a whole universe is computed in
+# one call. Rows before an indicator's minimum period are NaN, and every recursion is seeded
+# and evaluated in the same order as backtrader so the values agree with a cerebro run on the
+# same bars. ewm_mean() does the same for pandas' ewm.
+
+def window_sum(values, period):
+    # Sum of every window of period rows down axis 0, correctly rounded like the math.fsum
+    # backtrader's averages use. Error-free two-sum steps give each window's float sum and its
+    # exact rounding errors; adding those back settles the rounding except when the result
+    # sits within the errors' own rounding of a halfway point, and only those windows are
+    # summed again with math.fsum.
+    windows = sliding_window_view(np.asarray(values, dtype='float64'), period, axis=0)
+    total = np.zeros(windows.shape[:-1])
+    error = np.zeros(windows.shape[:-1])
+    error_size = np.zeros(windows.shape[:-1])
+    with np.errstate(invalid='ignore', over='ignore'):
+        for k in range(period):
+            value = windows[..., k]
+            updated = total + value
+            part = updated - total
+            rounding = (total - (updated - part)) + (value - part)
+            total = updated
+            error += rounding
+            error_size += np.abs(rounding)
+        out = total + error
+        part = out - total
+        tail = ((total - (out - part)) + (error - part)) * np.sign(out)
+        bound = 2 * period * np.finfo('float64').eps * error_size
+        gap = np.spacing(np.abs(out))
+        gap_toward_zero = np.where(np.frexp(out)[0] == 0.5, gap / 2, gap)
+        settled = (tail + bound < gap / 2) & (tail - bound > -gap_toward_zero / 2)
+    for index in zip(*np.nonzero(~settled & np.isfinite(out))):
+        out[index] = math.fsum(windows[index].tolist())
+    return out
+
+def sma(values, period):
+    values = np.asarray(values, dtype='float64')
+    out = np.full(values.shape, np.nan)
+    if len(values) >= period:
+        out[period - 1:] = window_sum(values, period) / period
+    return out
+
+def rolling_extreme(values, window, extreme=np.maximum):
+    # np.maximum or np.minimum of the last window values, the current one included, by van
+    # Herk/Gil-Werman: running extremes forward and backward within blocks of window rows,
+    # so every row costs the same whatever the window
+    values = np.asarray(values, dtype='float64')
+    out = np.full(values.shape, np.nan)
+    n = len(values)
+    if n < window:
+        return out
+    blocks = -(-n // window)
+    padded = np.full((blocks * window,) + values.shape[1:], np.nan)
+    padded[:n] = values
+    padded = padded.reshape((blocks, window) + values.shape[1:])
+    forward = extreme.accumulate(padded, axis=1).reshape((-1,) + values.shape[1:])
+    backward = extreme.accumulate(padded[:, ::-1], axis=1)[:, ::-1].reshape((-1,) + values.shape[1:])
+    out[window - 1:] = extreme(backward[:n - window + 1], forward[window - 1:n])
+    return out
+
+def consolidation(high, low, close, window):
+    # ConsolidationBreakout's range: the highest and lowest close of the last window bars
+    # (the current bar included) and whether the bar's high and low stay strictly inside it
+    range_high = rolling_extreme(close, window, np.maximum)
+    range_low = rolling_extreme(close, window, np.minimum)
+    with np.errstate(invalid='ignore'):
+        in_range = (np.asarray(high) < range_high) & (np.asarray(low) > range_low)
+    return range_high, range_low, np.where(np.isnan(range_high), np.nan, in_range.astype('float64'))
+
+def smoothed(values, period, alpha, start=0):
+    # ExponentialSmoothing: seeded with the SMA of the first period values from start, then
+    # prev * (1 - alpha) + value * alpha
+    values = np.asarray(values, dtype='float64')
+    out = np.full(values.shape, np.nan)
+    seed = start + period - 1
+    if len(values) <= seed:
+        return out
+    alpha1 = 1.0 - alpha
+    out[seed] = window_sum(values[start:seed + 1], period)[0] / period
+    for i in range(seed + 1, len(values)):
+        out[i] = out[i - 1] * alpha1 + values[i] * alpha
+    return out
+
+def ema(values, period):
+    return smoothed(values, period, 2.0 / (1.0 + period))
+
+def ewm_mean(values, span):
+    # pandas' ewm(span=span, adjust=False).mean() down axis 0, evaluated with the same operations
+    # (and the same skip when the value equals the average) so comparisons against it agree
+    values = np.asarray(values, dtype='float64')
+    alpha = 1.0 / (1.0 + (span - 1) / 2.0)
+    old_weight = 1.0 - alpha
+    out = np.empty(values.shape)
+    if not len(values):
+        return out
+    out[0] = values[0]
+    for i in range(1, len(values)):
+        updated = (old_weight * out[i - 1] + alpha * values[i]) / (old_weight + alpha)
+        out[i] = np.where(out[i - 1] != values[i], updated, out[i - 1])
+    return out
+
+def rsi(close, period=14):
+    # Wilder RSI on SMMA averages. backtrader divides without a guard, so a ticker whose
+    # down average is exactly 0 raises there; the second result flags those columns.
+    close = np.asarray(close, dtype='float64')
+    change = np.full(close.shape, np.nan)
+    change[1:] = close[1:] - close[:-1]
+    up_average = smoothed(np.maximum(change, 0.0), period, 1.0 / period, start=1)
+    down_average = smoothed(np.maximum(-change, 0.0), period, 1.0 / period, start=1)
+    zero_division = (down_average == 0.0).any(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100.0 - 100.0 / (1.0 + up_average / down_average)
+    return out, zero_division
+
+def atr(high, low, close, period=14):
+    # Wilder ATR: SMMA of the true range, which starts on the second bar
+    close = np.asarray(close, dtype='float64')
+    previous_close = np.full(close.shape, np.nan)
+    previous_close[1:] = close[:-1]
+    true_range = np.maximum(high, previous_close) - np.minimum(low, previous_close)
+    return smoothed(true_range, period, 1.0 / period, start=1)
+
+def supertrend(high, low, close, period=7, multiplier=3):
+    # Supertrend on the ATR above, with the usual ratcheting final bands: the upper band only
+    # moves down (and the lower band only up) unless the previous close broke through it.
+    # The trend turns up (1) when the close ends above the final upper band and down (-1)
+    # when it ends below the final lower band; the line is the lower band in an uptrend and
+    # the upper band in a downtrend. Starts in a downtrend on the first ATR bar. multiplier
+    # can be one value per column, so several multipliers run in one pass over tiled columns.
+    high = np.asarray(high, dtype='float64')
+    low = np.asarray(low, dtype='float64')
+    close = np.asarray(close, dtype='float64')
+    band = multiplier * atr(high, low, close, period)
+    hl2 = (high + low) / 2
+    basic_upper = hl2 + band
+    basic_lower = hl2 - band
+
+    line = np.full(close.shape, np.nan)
+    direction = np.full(close.shape, np.nan)
+    if len(close) <= period:
+        return line, direction
+    upper = basic_upper[period].copy()
+    lower = basic_lower[period].copy()
+    trend = np.where(close[period] > upper, 1.0, -1.0)
+    line[period] = np.where(trend > 0, lower, upper)
+    direction[period] = trend
+    for i in range(period + 1, len(close)):
+        upper = np.where((basic_upper[i] < upper) | (close[i - 1] > upper), basic_upper[i], upper)
+        lower = np.where((basic_lower[i] > lower) | (close[i - 1] < lower), basic_lower[i], lower)
+        trend = np.where(trend < 0, np.where(close[i] > upper, 1.0, -1.0), np.where(close[i] < lower, -1.0, 1.0))
+        line[i] = np.where(trend > 0, lower, upper)
+        direction[i] = trend
+    # Rows past a ticker's last bar
+    line[np.isnan(band)] = np.nan
+    direction[np.isnan(band)] = np.nan
+    return line, direction
+
+def crossover(a, b):
+    # 1.0 where a crosses above b, -1.0 where it crosses below, 0.0 otherwise. The previous
+    # difference is the last non-zero one, seeded on the first bar both inputs exist.
+    a = np.asarray(a, dtype='float64')
+    b = np.asarray(b, dtype='float64')
+    if a.ndim == 1:
+        return crossover(a[:, None], b[:, None])[:, 0]
+    difference = a - b
+    valid = ~np.isnan(difference)
+    rows = np.arange(len(difference))[:, None]
+    start = np.where(valid.any(axis=0), valid.argmax(axis=0), len(difference))
+    keep = valid & ((difference != 0.0) | (rows == start))
+    last = np.maximum.accumulate(np.where(keep, rows, -1), axis=0)
+    nonzero = np.take_along_axis(difference, last.clip(min=0), axis=0)
+
+    out = np.full(difference.shape, np.nan)
+    previous = nonzero[:-1]
+    with np.errstate(invalid='ignore'):
+        cross = ((previous < 0.0) & (a[1:] > b[1:])).astype('float64') - ((previous > 0.0) & (a[1:] < b[1:]))
+    after_start = (rows[1:] > start) & valid[1:]
+    out[1:] = np.where(after_start, cross, np.nan)
+    return out
@@ -0,0 +1,86 @@
+# stock_trading/ingest.py
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+
+from .store import OHLCVStore, DATA_DIR
+from .providers import get_provider
+
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+def rate_limited(download, limiter):
+    def limited_download(*args, **kwargs):
+        limiter.wait()
+        return download(*args, **kwargs)
+    return limited_download
+
+def fetch_with_retries(store, ticker, start_date, end_date, interval, retries, backoff):
+    for attempt in range(retries + 1):
+        try:
+            return store.fetch(ticker, start_date, end_date, interval=interval)
+        except Exception as e:
+            if attempt == retries:
+                print(f"Giving up on {ticker} after {retries + 1} attempts: {e}")
+                return None
+            time.sleep(backoff * 2 ** attempt)
+
+def ingest(tickers, start_date, end_date, interval='1d', root=DATA_DIR, workers=8, rate=5.0,
+           retries=3, backoff=1.0, batch_size=100):
+    store = OHLCVStore(root, download=rate_limited(get_provider().download, RateLimiter(rate)))
+    pending = [ticker for ticker in tickers if not store.is_missing(ticker, start_date, end_date, interval)]
+    print(f'Ingesting {len(pending)} tickers ({len(tickers) - len(pending)} known empty, skipped)...')
+
+    counts = {'stored': 0, 'empty': 0, 'failed': 0}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch_start in range(0, len(pending), batch_size):
+            batch = pending[batch_start:batch_start + batch_size]
+            futures = [executor.submit(fetch_with_retries, store, ticker, start_date, end_date, interval, retries, backoff)
+                       for ticker in batch]
+            for future in as_completed(futures):
+                df = future.result()
+                if df is None:
+                    counts['failed'] += 1
+                elif df.empty:
+                    counts['empty'] += 1
+                else:
+                    counts['stored'] += 1
+            print(f"{min(batch_start + batch_size, len(pending))}/{len(pending)} done: {counts}")
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Download the equity universe into the local OHLCV store.')
+    parser.add_argument('--equity-file', default='equity_full.csv')
+    parser.add_argument('--suffix', default='.NS')
+    parser.add_argument('--start', default='2000-01-01')
+    parser.add_argument('--end', default=pd.Timestamp.today().strftime('%Y-%m-%d'))
+    parser.add_argument('--interval', default='1d')
+    parser.add_argument('--root', default=DATA_DIR)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=5.0, help='Max requests per second')
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--backoff', type=float, default=1.0, help='Initial retry delay in seconds')
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    stocks = pd.read_csv(args.equity_file)['Ticker'].tolist()
+    ingest([f'{ticker}{args.suffix}' for ticker in stocks], args.start, args.end, interval=args.interval,
+           root=args.root, workers=args.workers, rate=args.rate, retries=args.retries,
+           backoff=args.backoff, batch_size=args.batch_size)
+
+if __name__ == '__main__':
+    main()
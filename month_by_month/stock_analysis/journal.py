@@ -0,0 +1,67 @@
+# stock_trading/journal.py
+
+import json
+import os
+import pickle
+import sqlite3
+import pandas as pd
+
+from .clean import CLEAN_VERSION
+
+def run_context(start_date, end_date, interval, suffix, cash, **settings):
+    # The settings of a run a unit's record depends on besides its params, including the
+    # store's cleaning version, for the unit's journal key
+    return dict(start_date=start_date, end_date=end_date, interval=interval, suffix=suffix, cash=cash,
+                clean_version=CLEAN_VERSION, **settings)
+
+class RunJournal:
+    # Which (strategy, params, ticker) units of a long run have finished, with their records,
+    # in a SQLite file. Rerunning with the same journal replays finished units instead of
+    # running them again. A unit's key includes its run_context(), so a unit finished for
+    # another date range, interval or data version is run again rather than replayed. Records are pickled, so replayed trades keep their datetime.date and
+    # float values and can share a report buffer with fresh ones. Each ticker is committed as
+    # it completes, and the file is in WAL mode, so another process can read the partial
+    # results while the run goes on. Units skipped for lack of data are not recorded:
+    # fetch_data returns nothing on a network error, so those are tried again.
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS finished_units (strategy TEXT, params TEXT, ticker TEXT, record BLOB, '
+            'finished_at TEXT, PRIMARY KEY (strategy, params, ticker))')
+        self.connection.commit()
+
+    @staticmethod
+    def params_key(params, context=None):
+        return json.dumps({'params': params, 'context': context or {}}, sort_keys=True, default=str)
+
+    def finished(self, strategy):
+        # {(params key, ticker)} of the units of a strategy that are done, without their records
+        rows = self.connection.execute('SELECT params, ticker FROM finished_units WHERE strategy = ?', (strategy,))
+        return set(rows)
+
+    def replay(self, strategy, ticker):
+        # {params key: record} of a ticker's finished units
+        rows = self.connection.execute('SELECT params, record FROM finished_units WHERE strategy = ? AND ticker = ?',
+                                       (strategy, ticker))
+        return {params: pickle.loads(record) for params, record in rows}
+
+    def record(self, units):
+        # Stores one ticker's (strategy, params key, record) units, records as run_sweep /
+        # run_batch yield them, in one transaction
+        finished_at = pd.Timestamp.now().isoformat()
+        rows = [(strategy, key, record['ticker'], pickle.dumps(record), finished_at)
+                for strategy, key, record in units if record.get('skipped') != 'No data']
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO finished_units VALUES (?, ?, ?, ?, ?)', rows)
+
+    def records(self, strategy=None):
+        # Finished records so far, in the order they finished
+        query = 'SELECT record FROM finished_units' + (' WHERE strategy = ?' if strategy else '') + ' ORDER BY finished_at, rowid'
+        for (record,) in self.connection.execute(query, (strategy,) if strategy else ()):
+            yield pickle.loads(record)
+
+    def close(self):
+        self.connection.close()
@@ -6,8 +6,9 @@ def main():
     start_date = '2007-01-01'
     end_date = '2024-06-14'
     equity_file = 'equity.csv'
+    listing_file = '../EQUITY_L.csv'
 
-    pipeline = TradingPipeline(start_date, end_date, equity_file)
+    pipeline = TradingPipeline(start_date, end_date, equity_file, listing_file)
     pipeline.run()
 
 if __name__ == '__main__':
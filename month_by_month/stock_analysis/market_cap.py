@@ -0,0 +1,49 @@
+# stock_trading/market_cap.py
+
+import os
+import pandas as pd
+
+from .store import DATA_DIR
+from .providers import get_provider
+
+SNAPSHOT_FILE = os.path.join(DATA_DIR, 'market_caps.parquet')
+SNAPSHOT_TTL_DAYS = 7
+
+def get_market_cap(ticker):
+    # None when the provider has no market cap for the symbol; request errors raise
+    return get_provider().market_cap(ticker)
+
+def read_snapshot(path=SNAPSHOT_FILE):
+    if not os.path.exists(path):
+        return pd.DataFrame({'market_cap': pd.Series(dtype='float64'), 'fetched_at': pd.Series(dtype='datetime64[ns]')})
+    return pd.read_parquet(path)
+
+def load_market_caps(tickers, suffix='', path=SNAPSHOT_FILE, ttl_days=SNAPSHOT_TTL_DAYS):
+    # Market caps come from a local snapshot; only symbols that are missing or older
+    # than the TTL hit the network. A symbol the provider has no cap for is stored as NaN so
+    # it is not retried until that expires either. A symbol whose request failed is left out
+    # of the snapshot, so it stays stale (keeping any previous value) and is retried next run.
+    snapshot = read_snapshot(path)
+    symbols = pd.Index([f'{ticker}{suffix}' for ticker in tickers])
+    fetched_at = snapshot['fetched_at'].reindex(symbols)
+    stale = symbols[fetched_at.isna() | (fetched_at < pd.Timestamp.now() - pd.Timedelta(days=ttl_days))]
+
+    if len(stale):
+        print(f'Refreshing market caps for {len(stale)} tickers...')
+        fetched = {}
+        for symbol in stale:
+            try:
+                fetched[symbol] = get_market_cap(symbol)
+            except Exception as e:
+                print(f"Error fetching market cap for {symbol}: {e}")
+        fresh = pd.DataFrame({
+            'market_cap': pd.Series(list(fetched.values()), index=pd.Index(list(fetched)), dtype='float64'),
+            'fetched_at': pd.Timestamp.now(),
+        })
+        snapshot = pd.concat([snapshot.drop(fresh.index, errors='ignore'), fresh])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        snapshot.to_parquet(path)
+
+    market_caps = snapshot['market_cap'].reindex(symbols)
+    market_caps.index = pd.Index(tickers)
+    return market_caps
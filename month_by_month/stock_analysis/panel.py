@@ -0,0 +1,130 @@
+# stock_trading/panel.py
+
+import hashlib
+import json
+import os
+from collections.abc import Mapping
+import numpy as np
+import pandas as pd
+
+from .store import OHLCVStore, DATA_DIR
+from .resample import DERIVED_INTERVALS
+
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume', 'Adj Open', 'Adj High', 'Adj Low')
+
+class Panel:
+    # ticker x date x field float array on a shared trading-date index, kept in a .npy file
+    # that is memory-mapped on open. Bars a ticker does not have (before listing, after
+    # delisting, suspensions) are NaN.
+    def __init__(self, values, dates, tickers, fields):
+        self.values = values
+        self.dates = dates
+        self.tickers = tickers
+        self.fields = fields
+        self.ticker_index = {ticker: i for i, ticker in enumerate(tickers)}
+        self.field_index = {field: i for i, field in enumerate(fields)}
+
+    @classmethod
+    def open(cls, root, mode='r'):
+        with open(os.path.join(root, 'meta.json')) as f:
+            meta = json.load(f)
+        values = np.load(os.path.join(root, 'values.npy'), mmap_mode=mode)
+        dates = pd.DatetimeIndex(np.load(os.path.join(root, 'dates.npy')), name='Date')
+        return cls(values, dates, meta['tickers'], tuple(meta['fields']))
+
+    @classmethod
+    def build(cls, root, tickers, load, fields=FIELDS, dtype='float64'):
+        # Two passes over load(ticker) so only one frame is held in memory at a time:
+        # the first collects the date index, the second fills the memory-mapped array.
+        indexes = {}
+        for ticker in tickers:
+            df = load(ticker)
+            if df is not None and not df.empty:
+                indexes[ticker] = df.index
+        tickers = list(indexes)
+        dates = pd.DatetimeIndex(np.unique(np.concatenate([index.to_numpy() for index in indexes.values()]))
+                                 if indexes else [], dtype='datetime64[ns]', name='Date')
+
+        os.makedirs(root, exist_ok=True)
+        values = np.lib.format.open_memmap(os.path.join(root, 'values.npy'), mode='w+', dtype=dtype,
+                                           shape=(len(tickers), len(dates), len(fields)))
+        values[:] = np.nan
+        for i, ticker in enumerate(tickers):
+            df = load(ticker)
+            values[i, dates.get_indexer(df.index), :] = df.reindex(columns=list(fields)).to_numpy(dtype=dtype)
+        values.flush()
+        del values
+        return cls.create(root, None, dates, tickers, fields)
+
+    @classmethod
+    def create(cls, root, values, dates, tickers, fields):
+        # Writes the panel files (values.npy is left alone when values is None) and reopens
+        # them memory-mapped. meta.json is written last and marks the panel as complete.
+        os.makedirs(root, exist_ok=True)
+        if values is not None:
+            np.save(os.path.join(root, 'values.npy'), values)
+        np.save(os.path.join(root, 'dates.npy'), pd.DatetimeIndex(dates).to_numpy())
+        with open(os.path.join(root, 'meta.json'), 'w') as f:
+            json.dump({'tickers': list(tickers), 'fields': list(fields)}, f)
+        return cls.open(root)
+
+    def field(self, name):
+        return self.values[:, :, self.field_index[name]]
+
+    def bar_counts(self):
+        return np.count_nonzero(~np.isnan(self.field('Close')), axis=1)
+
+    def frame(self, ticker):
+        values = self.values[self.ticker_index[ticker]]
+        has_bar = ~np.isnan(values[:, self.field_index['Close']])
+        return pd.DataFrame(values[has_bar], index=self.dates[has_bar], columns=list(self.fields))
+
+class PanelFrames(Mapping):
+    # Read-only ticker -> DataFrame view over a Panel, built on access, for code that
+    # still expects the old dict of frames.
+    def __init__(self, panel, min_bars=0):
+        self.panel = panel
+        counts = panel.bar_counts()
+        self.tickers = [ticker for ticker, count in zip(panel.tickers, counts) if count and count >= min_bars]
+        self.ticker_set = set(self.tickers)
+
+    def __getitem__(self, ticker):
+        if ticker not in self.ticker_set:
+            raise KeyError(ticker)
+        return self.panel.frame(ticker)
+
+    def __iter__(self):
+        return iter(self.tickers)
+
+    def __len__(self):
+        return len(self.tickers)
+
+def panel_path(name, start_date, end_date, interval='1d'):
+    return os.path.join(DATA_DIR, 'panels', f'{name}_{start_date}_{end_date}_{interval}')
+
+def universe_key(tickers, suffix=''):
+    # Short digest of a ticker list, so universes filtered differently get their own panel
+    return hashlib.sha1('\n'.join(sorted(f'{ticker}{suffix}' for ticker in tickers)).encode()).hexdigest()[:12]
+
+def load_panel(tickers, start_date, end_date, interval='1d', suffix='', root=None, store=None):
+    # Opens the panel of exactly these tickers under root, building it from the OHLCV store the
+    # first time and rebuilding it when the store has been topped up since
+    store = store or OHLCVStore()
+    root = os.path.join(root or panel_path('universe', start_date, end_date, interval), universe_key(tickers, suffix))
+    meta_path = os.path.join(root, 'meta.json')
+    if os.path.exists(meta_path):
+        built_at = os.path.getmtime(meta_path)
+        stored_interval = '1d' if interval in DERIVED_INTERVALS else interval
+        paths = (store.path(f'{ticker}{suffix}', stored_interval) for ticker in tickers)
+        if not any(os.path.exists(path) and os.path.getmtime(path) > built_at for path in paths):
+            return Panel.open(root)
+        os.remove(meta_path)
+
+    def load(ticker):
+        try:
+            return store.fetch(f'{ticker}{suffix}', start_date, end_date, interval=interval)
+        except Exception as e:
+            print(f"Error fetching data for {ticker}: {e}")
+            return None
+
+    return Panel.build(root, tickers, load)
@@ -0,0 +1,219 @@
+# stock_trading/panel_backtest.py
+
+import numpy as np
+import pandas as pd
+
+from .indicators import sma, ema, rsi, crossover
+
+# The single-ticker backtrader strategies run over a whole universe at once. Every ticker is
+# its own account (100000 cash, at most 30000 per buy, market orders filled at the next
+# bar's open), exactly like one cerebro per ticker, but the bar loop steps all tickers
+# together. backtest_panel() returns the per-ticker summary and completed-trades frames the
+# stock-by-stock scripts write; scan_panel() only finds the bars a strategy's entry fires on.
+
+class Bars:
+    # Each ticker's bars moved to the top of a bar x ticker array, the way a single feed sees
+    # them: row k is the ticker's k-th bar, whatever its date. Rows past the last bar are NaN.
+    def __init__(self, panel, tickers=None, fields=('Open', 'High', 'Low', 'Close')):
+        tickers = panel.tickers if tickers is None else tickers
+        self.tickers = [ticker for ticker in tickers if ticker in panel.ticker_index]
+        rows = [panel.ticker_index[ticker] for ticker in self.tickers]
+        has_bar = ~np.isnan(panel.values[rows, :, panel.field_index['Close']])
+        self.lengths = has_bar.sum(axis=1)
+        n_bars = int(self.lengths.max()) if len(rows) else 0
+        order = np.argsort(~has_bar, axis=1, kind='stable')[:, :n_bars]
+        live = (np.arange(n_bars)[:, None] < self.lengths).T
+
+        self.dates = panel.dates
+        self.date_rows = order.T
+        for field in fields:
+            values = np.take_along_axis(panel.values[rows, :, panel.field_index[field]], order, axis=1)
+            setattr(self, field.lower(), np.where(live, values, np.nan).T)
+
+    def date(self, bar, column):
+        return self.dates[self.date_rows[bar, column]].date()
+
+class PanelBuyAboveHigh:
+    # stock_by_stock_analysis/all_stock_analysis_backtrader.py's BuyAboveHigh
+    def __init__(self, ema_period=5):
+        self.ema_period = ema_period
+
+    def prepare(self, bars):
+        # The strategy's first next() waits for the EMA and the CrossOver built on it
+        self.minperiod = self.ema_period + 1
+        self.ema = ema(bars.close, self.ema_period)
+        self.skip = np.zeros(len(bars.tickers), dtype=bool)
+
+    def entry(self, bars, i):
+        return (bars.close[i] > bars.high[i - 1]) & (bars.high[i - 1] < self.ema[i - 1])
+
+    def exit(self, bars, i, signal_close):
+        target = 0.5 * signal_close
+        stop_loss = 0.75 * signal_close
+        return (bars.close[i] >= target) | (bars.close[i] <= stop_loss)
+
+class PanelBuyWithRSIAndMovingAverages:
+    # RSI_by_DJ/stock_by_stock.py's BuyWithRSIAndMovingAverages
+    def __init__(self, ma_period1=21, ma_period2=36, rsi_period=14):
+        self.ma_period1 = ma_period1
+        self.ma_period2 = ma_period2
+        self.rsi_period = rsi_period
+
+    def prepare(self, bars):
+        self.minperiod = max(self.ma_period1 + 1, self.ma_period2 + 1, self.rsi_period + 1)
+        self.ma2 = sma(bars.close, self.ma_period2)
+        self.buy_signal = crossover(sma(bars.close, self.ma_period1), self.ma2)
+        # cerebro.run() raises on these tickers and the script skips them
+        self.rsi, self.skip = rsi(bars.close, self.rsi_period)
+
+    def entry(self, bars, i):
+        return (self.rsi[i] > 60) & (self.buy_signal[i] == 1)
+
+    def exit(self, bars, i, signal_close):
+        return bars.close[i] < self.ma2[i]
+
+class PanelMovingAverageCrossover:
+    # MovingCrossOver/hyperparameter.py's MovingAverageCrossover
+    def __init__(self, fast_period=10, slow_period=30):
+        self.fast_period = fast_period
+        self.slow_period = slow_period
+
+    def prepare(self, bars):
+        self.minperiod = max(self.fast_period, self.slow_period) + 1
+        self.crossover = crossover(sma(bars.close, self.fast_period), sma(bars.close, self.slow_period))
+        self.skip = np.zeros(len(bars.tickers), dtype=bool)
+
+    def entry(self, bars, i):
+        return self.crossover[i] > 0
+
+    def exit(self, bars, i, signal_close):
+        return self.crossover[i] < 0
+
+def simulate(bars, strategy, cash=100000, max_cash=30000):
+    # Broker arithmetic follows backtrader's BackBroker (zero commission), so cash, sizes
+    # and pnl match to the last bit. Returns closed trades as arrays in close order.
+    strategy.prepare(bars)
+    n_bars, n = bars.close.shape
+    cash = np.full(n, float(cash))
+    size = np.zeros(n)
+    position_price = np.zeros(n)
+    trade_price = np.zeros(n)
+    pending_buy = np.zeros(n)
+    pending_sell = np.zeros(n, dtype=bool)
+    buy_bar = np.full(n, -1)
+    sell_bar = np.full(n, -1)
+    signal_close = np.full(n, np.nan)
+    closed = []
+
+    for i in range(n_bars):
+        live = i < bars.lengths
+        open_, close = bars.open[i], bars.close[i]
+
+        # Orders from the previous bar fill at this bar's open; a buy the cash cannot cover is rejected
+        buying = np.flatnonzero(live & (pending_buy > 0))
+        remaining = cash[buying] - pending_buy[buying] * open_[buying]
+        filled = buying[remaining >= 0.0]
+        cash[filled] = remaining[remaining >= 0.0]
+        size[filled] = pending_buy[filled]
+        position_price[filled] = open_[filled]
+        trade_price[filled] = size[filled] * open_[filled] / size[filled]
+
+        selling = np.flatnonzero(live & pending_sell & (size > 0))
+        if len(selling):
+            pnl = size[selling] * (open_[selling] - trade_price[selling])
+            cash[selling] += size[selling] * position_price[selling] + size[selling] * (open_[selling] - position_price[selling])
+            closed.append((selling, buy_bar[selling], sell_bar[selling], pnl, trade_price[selling]))
+            size[selling] = 0.0
+        pending_buy[:] = 0.0
+        pending_sell[:] = False
+
+        active = live & (i >= strategy.minperiod - 1)
+        if not active.any():
+            continue
+        with np.errstate(divide='ignore', invalid='ignore'):
+            order_size = np.minimum(cash // close, max_cash // close)
+        entering = active & (size == 0) & strategy.entry(bars, i) & (order_size > 0)
+        pending_buy[entering] = order_size[entering]
+        buy_bar[entering] = i
+        signal_close[entering] = close[entering]
+
+        leaving = active & (size > 0) & strategy.exit(bars, i, signal_close)
+        pending_sell[leaving] = True
+        sell_bar[leaving] = i
+
+    if not closed:
+        return tuple(np.array([], dtype=dtype) for dtype in ('int64', 'int64', 'int64', 'float64', 'float64'))
+    return tuple(np.concatenate(parts) for parts in zip(*closed))
+
+def backtest_panel(panel, strategy, tickers=None, min_bars=0, cash=100000, max_cash=30000):
+    # Tickers without bars, with fewer than min_bars, or that backtrader would fail on are left
+    # out, as the stock-by-stock loop skips them.
+    bars = Bars(panel, tickers)
+    column, buy_bar, sell_bar, pnl, trade_price = simulate(bars, strategy, cash, max_cash)
+    order = np.argsort(column, kind='stable')
+    column, buy_bar, sell_bar, pnl, trade_price = (part[order] for part in (column, buy_bar, sell_bar, pnl, trade_price))
+
+    completed_trades = pd.DataFrame({
+        'ticker': [bars.tickers[c] for c in column],
+        'buy_date': [bars.date(bar, c) for bar, c in zip(buy_bar, column)],
+        'buy_price': bars.close[buy_bar, column].tolist(),
+        'sell_date': [bars.date(bar, c) for bar, c in zip(sell_bar, column)],
+        'sell_price': bars.close[sell_bar, column].tolist(),
+        'profit': pnl.tolist(),
+        'profit_percent': (pnl / trade_price * 100).tolist(),
+    })
+
+    run = (bars.lengths >= max(min_bars, 1)) & ~strategy.skip
+    starts = np.searchsorted(column, np.arange(len(bars.tickers) + 1))
+    rows = []
+    for c in np.flatnonzero(run):
+        trades = completed_trades.iloc[starts[c]:starts[c + 1]]
+        if trades.empty:
+            rows.append({'Ticker': bars.tickers[c], 'Total Trades': 0, 'Profitable Trades': 0, 'Losing Trades': 0,
+                         'Total Profit/Loss': 0, 'Profit Percentage': 0, 'Buy Prices': '', 'Sell Prices': ''})
+            continue
+        profits = trades['profit'].tolist()
+        total = sum(profits)
+        won = sum(profit >= 0.0 for profit in profits)
+        rows.append({
+            'Ticker': bars.tickers[c],
+            'Total Trades': len(profits),
+            'Profitable Trades': won,
+            'Losing Trades': len(profits) - won,
+            'Total Profit/Loss': int(round(total)),
+            'Profit Percentage': round((total / cash) * 100, 2),
+            'Buy Prices': ', '.join(map(str, trades['buy_price'].dropna().tolist())),
+            'Sell Prices': ', '.join(map(str, trades['sell_price'].dropna().tolist())),
+        })
+
+    skipped = set(np.flatnonzero(~run))
+    completed_trades = completed_trades[[c not in skipped for c in column]].reset_index(drop=True)
+    columns = ['Ticker', 'Total Trades', 'Profitable Trades', 'Losing Trades', 'Total Profit/Loss',
+               'Profit Percentage', 'Buy Prices', 'Sell Prices']
+    return pd.DataFrame(rows, columns=columns), completed_trades
+
+def scan(bars, strategy):
+    # (bar, column) of every bar where the strategy's entry condition holds once its minimum
+    # period is reached, for all bars in one evaluation: no orders, broker or position, so
+    # these are the bars a flat strategy would buy on. Sorted by column, then bar.
+    strategy.prepare(bars)
+    minperiod = np.asarray(strategy.minperiod)
+    rows = np.arange(int(minperiod.min()) - 1, bars.close.shape[0])
+    with np.errstate(invalid='ignore'):
+        hits = strategy.entry(bars, rows)
+    hits &= (rows[:, None] < bars.lengths) & (rows[:, None] >= minperiod - 1) & ~strategy.skip
+    bar, column = np.nonzero(hits)
+    order = np.lexsort((bar, column))
+    return rows[bar[order]], column[order]
+
+def scan_panel(panel, strategy, tickers=None, min_bars=0):
+    # Entry signals as Ticker / Date / Price (the signal bar's close) rows, ticker by ticker
+    bars = Bars(panel, tickers)
+    bar, column = scan(bars, strategy)
+    keep = bars.lengths[column] >= max(min_bars, 1)
+    bar, column = bar[keep], column[keep]
+    return pd.DataFrame({
+        'Ticker': [bars.tickers[c] for c in column],
+        'Date': [bars.date(b, c) for b, c in zip(bar, column)],
+        'Price': bars.close[bar, column],
+    })
@@ -1,34 +1,59 @@
 # stock_trading/pipeline.py
 
+import os
+import numpy as np
 import pandas as pd
-import backtrader as bt
 from datetime import datetime
 import calendar
 
-from .data_fetcher import fetch_data
-from .strategy import BuyAboveHigh
-from .sizer import MaxCashSizer
+from .panel import load_panel, panel_path, PanelFrames
+from .panel_backtest import Bars
+from .indicators import ewm_mean
+from .candidates import CandidateIndex
+from .portfolio import PortfolioSimulator
+from .universe import load_universe
+from .strategy import EMA_PERIOD
+
+TOP_N = 5
+RANK_BY = 'Volume'  # Any panel field, 'Turnover', or a ticker x date factor array
+
+def buy_above_high_screen(panel, ema_period=EMA_PERIOD):
+    # The monthly screen for every ticker and every date in one pass, as a ticker x date bool
+    # array on the panel's date grid: the bar closes above the ticker's previous high, that
+    # high was below the previous bar's EMA, and the ticker has more than ema_period bars so far.
+    bars = Bars(panel, fields=('High', 'Close'))
+    ema = ewm_mean(bars.close, ema_period)
+    flags = np.zeros(bars.close.shape, dtype=bool)
+    flags[1:] = (bars.close[1:] > bars.high[:-1]) & (bars.high[:-1] < ema[:-1])
+    flags[:ema_period] = False
+
+    screen = np.zeros((len(bars.tickers), len(panel.dates)), dtype=bool)
+    bar, column = np.nonzero(flags & (np.arange(len(flags))[:, None] < bars.lengths))
+    screen[column, bars.date_rows[bar, column]] = True
+    return screen
 
 class TradingPipeline:
-    def __init__(self, start_date, end_date, equity_file):
+    def __init__(self, start_date, end_date, equity_file, listing_file=None):
         self.start_date = start_date
         self.end_date = end_date
         self.equity_file = equity_file
         self.stocks = pd.read_csv(equity_file)['Ticker'].tolist()
+        universe = load_universe(self.stocks, listing_file=listing_file, refresh_market_caps=False)
+        self.stocks = universe.filter(listed_before=end_date, start=start_date, end=end_date,
+                                      interval='1d', min_bars=EMA_PERIOD)
+        universe_name = os.path.splitext(os.path.basename(equity_file))[0]
+        self.panel = load_panel(self.stocks, start_date, end_date, suffix='.NS',
+                                root=panel_path(universe_name, start_date, end_date))
         self.all_data = self.fetch_all_data()
-        self.cerebro = bt.Cerebro()
-        self.cerebro.broker.set_cash(100000)
-        self.cerebro.addsizer(MaxCashSizer)
+        self.screen = buy_above_high_screen(self.panel)
+        self.candidates = CandidateIndex.build(self.panel, self.screen,
+                                               pd.date_range(start=start_date, end=end_date, freq='MS'), factor=RANK_BY)
+        self.selections = {}
+        self.simulator = PortfolioSimulator(self.panel, cash=100000)
 
     def fetch_all_data(self):
-        all_data = {}
-        for ticker in self.stocks:
-            print(f'Fetching data for {ticker}...')
-            df = fetch_data(f'{ticker}.NS', self.start_date, self.end_date)
-            if not df.empty and len(df) >= EMA_PERIOD:
-                all_data[ticker] = df
-            else:
-                print(f"No sufficient data for {ticker}. Skipping.")
+        all_data = PanelFrames(self.panel, min_bars=EMA_PERIOD)
+        print(f'{len(all_data)} of {len(self.stocks)} tickers have sufficient data.')
         return all_data
 
     def process_month(self, date):
@@ -38,35 +63,19 @@ class TradingPipeline:
 
         print(f'Processing month: {date.strftime("%Y-%m")}')
 
-        selected_stocks = []
-        for ticker, df in self.all_data.items():
-            if date in df.index and len(df.loc[:date]) > EMA_PERIOD:
-                df_slice = df.loc[:date]
-                last_row = df_slice.iloc[-1]
-                prev_row = df_slice.iloc[-2]
-                ema_value = df_slice['Close'].ewm(span=EMA_PERIOD, adjust=False).mean().iloc[-2]
-
-                if last_row['Close'] > prev_row['High'] and prev_row['High'] < ema_value:
-                    selected_stocks.append((ticker, last_row['Volume'], last_row['Close']))
-
-        selected_stocks.sort(key=lambda x: x[1], reverse=True)
-        top_stocks = selected_stocks[:TOP_N]
-
-        for ticker, _, _ in top_stocks:
-            data = bt.feeds.PandasData(dataname=self.all_data[ticker], name=ticker)
-            self.cerebro.adddata(data)
+        # Screen hits are precomputed and ranked per date, so a month is a slice of the index
+        self.selections[date] = self.candidates.top(date, TOP_N)
 
     def run(self):
         for date in pd.date_range(start=self.start_date, end=self.end_date, freq='MS'):
             self.process_month(date)
 
-        self.cerebro.addstrategy(BuyAboveHigh)
-        self.cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trade')
-
-        result = self.cerebro.run()
-        strategy = result[0]
-        trades = pd.DataFrame(strategy.trades)
-        trade_analysis = strategy.analyzers.trade.get_analysis()
+        # Every pick trades from its own month on, in one account; a ticker picked in several
+        # months is still one series in the panel
+        trades = self.simulator.run(self.selections)
+        profits = trades['profit']
+        buy_prices = trades.groupby('ticker')['buy_price'].agg(list)
+        sell_prices = trades.groupby('ticker')['sell_price'].agg(list)
 
         all_trades_data = {
             'Ticker': [],
@@ -79,16 +88,16 @@ class TradingPipeline:
             'Month': []
         }
 
-        for trade in strategy.trades:
-            ticker = trade['ticker']
+        for trade in trades.itertuples():
+            ticker = trade.ticker
             all_trades_data['Ticker'].append(ticker)
-            all_trades_data['Total Trades'].append(trade_analysis.total.closed if 'total' in trade_analysis and 'closed' in trade_analysis.total else 0)
-            all_trades_data['Profitable Trades'].append(trade_analysis.won.total if 'won' in trade_analysis else 0)
-            all_trades_data['Losing Trades'].append(trade_analysis.lost.total if 'lost' in trade_analysis else 0)
-            all_trades_data['Total Profit/Loss'].append(int(round(trade_analysis.pnl.net.total)) if 'pnl' in trade_analysis and 'net' in trade_analysis.pnl else 0)
-            all_trades_data['Buy Prices'].append(', '.join(map(str, strategy.buy_prices[ticker])) if strategy.buy_prices[ticker] else '')
-            all_trades_data['Sell Prices'].append(', '.join(map(str, strategy.sell_prices[ticker])) if strategy.sell_prices[ticker] else '')
-            all_trades_data['Month'].append(date.strftime("%Y-%m"))
+            all_trades_data['Total Trades'].append(len(trades))
+            all_trades_data['Profitable Trades'].append(int((profits >= 0).sum()))
+            all_trades_data['Losing Trades'].append(int((profits < 0).sum()))
+            all_trades_data['Total Profit/Loss'].append(int(round(profits.sum())))
+            all_trades_data['Buy Prices'].append(', '.join(map(str, buy_prices[ticker])))
+            all_trades_data['Sell Prices'].append(', '.join(map(str, sell_prices[ticker])))
+            all_trades_data['Month'].append(trade.buy_date.strftime("%Y-%m"))
 
         all_trades_df = pd.DataFrame(all_trades_data)
         all_trades_df.to_csv('all_trades_report.csv', index=False)
@@ -0,0 +1,100 @@
+# stock_trading/portfolio.py
+
+import numpy as np
+import pandas as pd
+
+class PortfolioSimulator:
+    # One account trading a universe that changes every rebalance date, read straight from
+    # the panel: a ticker's bars exist once however often it is picked, and on each date only
+    # the day's picks, pending orders and open positions are looked at.
+    #
+    # Rules follow strategy.BuyAboveHigh with backtrader's broker: a pick is bought with
+    # min(cash, max_cash) // close shares by a market order filled at the ticker's next open
+    # (rejected if the cash cannot cover it), and sold at the next open after a close at or
+    # above target * entry close or at or below stop_loss * entry close. A ticker already held
+    # is not bought again.
+    def __init__(self, panel, cash=100000, max_cash=30000, stop_loss=0.75, target=3):
+        self.panel = panel
+        self.cash = cash
+        self.max_cash = max_cash
+        self.stop_loss = stop_loss
+        self.target = target
+
+    def bar(self, ticker, position):
+        values = self.panel.values[ticker, position]
+        fields = self.panel.field_index
+        return values[fields['Open']], values[fields['Close']]
+
+    def run(self, selections):
+        # selections maps a rebalance date to its picks, best first. Returns the closed trades.
+        panel = self.panel
+        picks = {}
+        for date, tickers in selections.items():
+            position = panel.dates.get_indexer([pd.Timestamp(date)])[0]
+            if position >= 0 and tickers:
+                picks[position] = [panel.ticker_index[ticker] for ticker in tickers]
+        if not picks:
+            return pd.DataFrame(columns=['ticker', 'buy_date', 'buy_price', 'sell_date', 'sell_price', 'size', 'profit'])
+
+        cash = float(self.cash)
+        orders = {}      # ticker -> ('buy', size, signal row, signal close) or ('sell', signal row, signal close)
+        positions = {}   # ticker -> [size, fill price, buy signal row, buy signal close]
+        trades = []
+        for t in range(min(picks), len(panel.dates)):
+            # Orders fill in the order they were placed, each at its ticker's first open after the signal
+            for ticker, order in list(orders.items()):
+                open_, close = self.bar(ticker, t)
+                if np.isnan(close):
+                    continue
+                del orders[ticker]
+                if order[0] == 'buy':
+                    _, size, row, signal_close = order
+                    if cash - size * open_ >= 0.0:
+                        cash -= size * open_
+                        positions[ticker] = [size, open_, row, signal_close]
+                else:
+                    size, price, buy_row, buy_close = positions.pop(ticker)
+                    cash += size * price + size * (open_ - price)
+                    # backtrader's trade price is the size-weighted average fill, size * price / size
+                    trades.append((ticker, buy_row, buy_close, order[1], order[2], size, size * (open_ - size * price / size)))
+
+            placed = []
+            for ticker, (size, price, row, signal_close) in positions.items():
+                _, close = self.bar(ticker, t)
+                if ticker in orders or np.isnan(close):
+                    continue
+                if close >= self.target * signal_close or close <= self.stop_loss * signal_close:
+                    placed.append((ticker, ('sell', t, close)))
+
+            for ticker in picks.get(t, []):
+                if ticker in positions or ticker in orders:
+                    continue
+                _, close = self.bar(ticker, t)
+                size = min(cash // close, self.max_cash // close)
+                if size > 0:
+                    placed.append((ticker, ('buy', size, t, close)))
+
+            # Like backtrader's submission check: the bar's orders are priced at the signal close
+            # against a running cash total, and once it goes negative the rest are rejected too
+            available = cash
+            for ticker, order in placed:
+                if order[0] == 'sell':
+                    size, price = positions[ticker][:2]
+                    available += size * price + size * (order[2] - price)
+                else:
+                    available -= order[1] * order[3]
+                if available >= 0.0:
+                    orders[ticker] = order
+
+            if not positions and not orders and t > max(picks):
+                break
+
+        return pd.DataFrame({
+            'ticker': [panel.tickers[trade[0]] for trade in trades],
+            'buy_date': [panel.dates[trade[1]].date() for trade in trades],
+            'buy_price': [float(trade[2]) for trade in trades],
+            'sell_date': [panel.dates[trade[3]].date() for trade in trades],
+            'sell_price': [float(trade[4]) for trade in trades],
+            'size': [float(trade[5]) for trade in trades],
+            'profit': [float(trade[6]) for trade in trades],
+        })
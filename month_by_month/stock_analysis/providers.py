@@ -0,0 +1,171 @@
+# stock_trading/providers.py
+
+import argparse
+import os
+import zlib
+import numpy as np
+import pandas as pd
+
+# Every download in the package goes through the active provider, so the pipelines can
+# run against Yahoo, generated data, or recorded fixtures. Pick one with
+# STOCK_DATA_PROVIDER=yahoo|synthetic|fixtures:<dir>, or call set_provider().
+
+class DataProvider:
+    def download(self, ticker, start_date, end_date, interval='1d'):
+        raise NotImplementedError
+
+    def market_cap(self, ticker):
+        raise NotImplementedError
+
+class YahooProvider(DataProvider):
+    def download(self, ticker, start_date, end_date, interval='1d'):
+        import yfinance as yf
+        from yfinance.exceptions import YFTickerMissingError
+
+        # Network failures raise. No prices comes back empty, whether for the whole symbol (delisted,
+        # bad symbol) or only for this range (YFPricesMissingError, a YFTickerMissingError); the store
+        # negative-caches the range, not the ticker.
+        try:
+            df = yf.Ticker(ticker).history(start=start_date, end=end_date, interval=interval,
+                                           auto_adjust=False, actions=False, raise_errors=True)
+        except YFTickerMissingError:
+            return pd.DataFrame()
+        df.index = df.index.tz_localize(None)
+        df.index.name = 'Date'
+        return df
+
+    def market_cap(self, ticker):
+        import yfinance as yf
+
+        ticker_info = yf.Ticker(ticker).info
+        if ticker_info and 'marketCap' in ticker_info and ticker_info['marketCap'] is not None:
+            return ticker_info['marketCap']
+        return None
+
+class SyntheticProvider(DataProvider):
+    # Deterministic random-walk OHLCV. Each ticker gets its own random streams, seeded from
+    # the provider seed and the symbol, and always generated from BASE_DATE. The same
+    # ticker therefore returns identical bars for any requested range.
+    BASE_DATE = '1995-01-02'
+    ADJUSTMENT_HORIZON = '2030-01-01'
+
+    def __init__(self, seed=0, missing_fraction=0.02):
+        self.seed = seed
+        self.missing_fraction = missing_fraction
+
+    def rng(self, ticker, stream):
+        return np.random.default_rng([self.seed, zlib.crc32(ticker.encode()), stream])
+
+    def universe(self, size):
+        return [f'SYN{i:04d}' for i in range(size)]
+
+    def daily(self, ticker, end_date):
+        dates = pd.bdate_range(self.BASE_DATE, pd.Timestamp(end_date) - pd.Timedelta(days=1), name='Date')
+        n = len(dates)
+        params = self.rng(ticker, 0)
+        if params.random() < self.missing_fraction:
+            return pd.DataFrame()
+        listed = int(params.integers(0, 5000))
+        start_price = params.uniform(10, 2000)
+        drift, volatility = params.normal(0.0003, 0.0003), params.uniform(0.01, 0.035)
+        dividend_yield = params.uniform(0, 0.03)
+
+        log_returns = self.rng(ticker, 1).normal(drift, volatility, n)
+        gaps, wicks = self.rng(ticker, 2).normal(0, volatility / 3, (2, n))
+        volume = self.rng(ticker, 3).lognormal(11, 1, n)
+
+        close = start_price * np.exp(np.cumsum(log_returns))
+        open_ = np.concatenate([[start_price], close[:-1]]) * np.exp(gaps)
+        high = np.maximum(open_, close) * (1 + np.abs(wicks))
+        low = np.minimum(open_, close) * (1 - np.abs(gaps + wicks) / 2)
+        years_left = (pd.Timestamp(self.ADJUSTMENT_HORIZON) - dates).days.to_numpy() / 365.25
+        df = pd.DataFrame({
+            'Open': open_, 'High': high, 'Low': low, 'Close': close,
+            'Adj Close': close * np.exp(-dividend_yield * years_left),
+            'Volume': volume.astype('int64'),
+        }, index=dates)
+        return df.iloc[listed:]
+
+    def download(self, ticker, start_date, end_date, interval='1d'):
+        df = self.daily(ticker, end_date)
+        if df.empty:
+            return df
+        if interval != '1d':
+            from .resample import resample_frame
+            df = resample_frame(df, interval)
+        return df.loc[(df.index >= pd.Timestamp(start_date)) & (df.index < pd.Timestamp(end_date))]
+
+    def market_cap(self, ticker):
+        return float(self.rng(ticker, 4).lognormal(23, 1.5))
+
+class FixtureProvider(DataProvider):
+    # Replays frames recorded with record_fixtures(); same layout as the OHLCV store.
+    def __init__(self, root):
+        self.root = root
+
+    def download(self, ticker, start_date, end_date, interval='1d'):
+        path = os.path.join(self.root, interval, f'{ticker}.parquet')
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        df = pd.read_parquet(path)
+        return df.loc[(df.index >= pd.Timestamp(start_date)) & (df.index < pd.Timestamp(end_date))]
+
+    def market_cap(self, ticker):
+        market_caps = pd.read_csv(os.path.join(self.root, 'market_caps.csv'), index_col='ticker')['market_cap']
+        market_cap = market_caps.get(ticker)
+        return None if market_cap is None or pd.isna(market_cap) else market_cap
+
+def record_fixtures(provider, tickers, start_date, end_date, root, interval='1d'):
+    os.makedirs(os.path.join(root, interval), exist_ok=True)
+    market_caps = []
+    for ticker in tickers:
+        df = provider.download(ticker, start_date, end_date, interval)
+        if not df.empty:
+            df.to_parquet(os.path.join(root, interval, f'{ticker}.parquet'))
+        market_caps.append((ticker, provider.market_cap(ticker)))
+    pd.DataFrame(market_caps, columns=['ticker', 'market_cap']).to_csv(os.path.join(root, 'market_caps.csv'), index=False)
+
+_provider = None
+
+def provider_from_name(name):
+    if name == 'yahoo':
+        return YahooProvider()
+    if name == 'synthetic':
+        return SyntheticProvider()
+    if name.startswith('fixtures:'):
+        return FixtureProvider(name[len('fixtures:'):])
+    raise ValueError(f'Unknown data provider: {name}')
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        _provider = provider_from_name(os.environ.get('STOCK_DATA_PROVIDER', 'yahoo'))
+    return _provider
+
+def set_provider(provider):
+    global _provider
+    _provider = provider
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic universe file and optionally record it as fixtures.')
+    parser.add_argument('--size', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--equity-file', default='synthetic_equity.csv')
+    parser.add_argument('--record', help='Directory to record fixture frames into')
+    parser.add_argument('--suffix', default='.NS')
+    parser.add_argument('--start', default='2004-01-01')
+    parser.add_argument('--end', default='2024-01-01')
+    parser.add_argument('--interval', default='1d')
+    args = parser.parse_args()
+
+    provider = SyntheticProvider(seed=args.seed)
+    stocks = provider.universe(args.size)
+    pd.DataFrame({'Ticker': stocks}).to_csv(args.equity_file, index=False)
+    print(f'Universe of {len(stocks)} tickers written to {args.equity_file}')
+    if args.record:
+        record_fixtures(provider, [f'{ticker}{args.suffix}' for ticker in stocks], args.start, args.end,
+                        args.record, interval=args.interval)
+        print(f'Fixtures recorded to {args.record}')
+
+if __name__ == '__main__':
+    main()
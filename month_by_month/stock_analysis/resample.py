@@ -0,0 +1,83 @@
+# stock_trading/resample.py
+
+import os
+import numpy as np
+import pandas as pd
+
+DERIVED_INTERVALS = ('1wk', '1mo')
+AGGREGATIONS = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Adj Close': 'last', 'Volume': 'sum',
+                'Adj Open': 'first', 'Adj High': 'max', 'Adj Low': 'min'}
+
+def period_labels(dates, interval):
+    # Bars are labelled with the first calendar day of their period, like Yahoo's own monthly/weekly bars
+    dates = pd.DatetimeIndex(dates).normalize()
+    if interval == '1mo':
+        return dates - pd.to_timedelta(dates.day - 1, unit='D')
+    if interval == '1wk':
+        return dates - pd.to_timedelta(dates.dayofweek, unit='D')
+    raise ValueError(f'Cannot derive {interval} bars from daily data')
+
+def period_bounds(dates, interval):
+    # (n_periods, 2) array of [start, end) daily row positions for every derived bar, and the bar labels
+    labels = period_labels(dates, interval)
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], len(labels)]
+    return np.column_stack([starts, ends]), labels[starts]
+
+def resample_frame(df, interval):
+    bounds, labels = period_bounds(df.index, interval)
+    agg = {field: how for field, how in AGGREGATIONS.items() if field in df.columns}
+    resampled = df.groupby(np.repeat(np.arange(len(bounds)), bounds[:, 1] - bounds[:, 0])).agg(agg)
+    resampled.index = pd.DatetimeIndex(labels, name=df.index.name or 'Date')
+    return resampled.dropna(subset=['Close'])
+
+def first_last_valid(values, starts):
+    # Positions of the first and last non-NaN value of every [starts[k], starts[k+1]) segment along axis 1
+    positions = np.arange(values.shape[1])
+    valid = ~np.isnan(values)
+    first = np.minimum.reduceat(np.where(valid, positions, values.shape[1]), starts, axis=1)
+    last = np.maximum.reduceat(np.where(valid, positions, -1), starts, axis=1)
+    return first, last
+
+def resample_values(values, fields, starts):
+    # Vectorized over every ticker at once: values is ticker x date x field, result is ticker x period x field
+    field_index = {field: i for i, field in enumerate(fields)}
+    out = np.full((values.shape[0], len(starts), len(fields)), np.nan)
+    close = np.asarray(values[:, :, field_index['Close']])
+    first, last = first_last_valid(close, starts)
+    has_bar = last >= 0
+    first, last = np.where(has_bar, first, 0), np.where(has_bar, last, 0)
+
+    for field, i in field_index.items():
+        column = np.asarray(values[:, :, i])
+        how = AGGREGATIONS.get(field, 'last')
+        if how == 'first':
+            result = np.take_along_axis(column, first, axis=1)
+        elif how == 'last':
+            result = np.take_along_axis(column, last, axis=1)
+        elif how == 'max':
+            result = np.fmax.reduceat(column, starts, axis=1)
+        elif how == 'min':
+            result = np.fmin.reduceat(column, starts, axis=1)
+        else:
+            result = np.add.reduceat(np.nan_to_num(column), starts, axis=1)
+        out[:, :, i] = np.where(has_bar, result, np.nan)
+    return out
+
+def resample_panel(panel, interval, root=None):
+    # Derived panel for interval, optionally cached at root. bounds maps every derived
+    # bar to its [start, end) rows in the daily panel.
+    from .panel import Panel
+
+    if root is not None and os.path.exists(os.path.join(root, 'meta.json')):
+        return Panel.open(root), np.load(os.path.join(root, 'bounds.npy'))
+
+    bounds, labels = period_bounds(panel.dates, interval)
+    values = resample_values(panel.values, panel.fields, bounds[:, 0])
+    dates = pd.DatetimeIndex(labels, name='Date')
+    if root is None:
+        return Panel(values, dates, panel.tickers, panel.fields), bounds
+
+    os.makedirs(root, exist_ok=True)
+    np.save(os.path.join(root, 'bounds.npy'), bounds)
+    return Panel.create(root, values, dates, panel.tickers, panel.fields), bounds
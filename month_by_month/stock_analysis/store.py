@@ -0,0 +1,136 @@
+# stock_trading/store.py
+
+import os
+import threading
+import pandas as pd
+
+from .providers import get_provider
+from .resample import DERIVED_INTERVALS, resample_frame
+from .clean import clean_ohlcv, CLEAN_VERSION
+
+DATA_DIR = os.environ.get('STOCK_DATA_DIR', os.path.join(os.path.expanduser('~'), '.stock_data'))
+MISSING_TTL_DAYS = 30
+
+def range_covered(ranges, start_date, end_date):
+    # Whether [start, end) lies inside one of the (start, end) ranges; an end past tomorrow is
+    # clipped the way fetch clips it
+    start = pd.Timestamp(start_date)
+    end = min(pd.Timestamp(end_date), pd.Timestamp.today().normalize() + pd.Timedelta(days=1))
+    return any(start >= checked_start and end <= checked_end for checked_start, checked_end in ranges)
+
+class OHLCVStore:
+    # One Parquet file per (interval, ticker). The date range that has already been
+    # asked of the network is kept in the frame's attrs, so a ticker that listed after
+    # the requested start is not downloaded again on every run.
+    def __init__(self, root=DATA_DIR, download=None):
+        self.root = root
+        self.download = download
+        self.lock = threading.Lock()
+        self._missing = None
+
+    def path(self, ticker, interval='1d'):
+        return os.path.join(self.root, interval, f'{ticker}.parquet')
+
+    def missing_path(self):
+        # Date ranges the network had no bars for. Only a request inside one of them is skipped:
+        # a ticker that listed in 2012 is empty for 2000-2005 but not for 2000-2024.
+        return os.path.join(self.root, 'missing_ranges.csv')
+
+    def missing(self):
+        with self.lock:
+            if self._missing is None:
+                self._missing = {}
+                if os.path.exists(self.missing_path()):
+                    for row in pd.read_csv(self.missing_path()).itertuples(index=False):
+                        self._missing.setdefault((row.ticker, row.interval), []).append(
+                            (pd.Timestamp(row.start), pd.Timestamp(row.end), pd.Timestamp(row.checked_at)))
+            return self._missing
+
+    def missing_ranges(self, ticker, interval='1d'):
+        # (start, end) of the empty ranges checked within the TTL
+        fresh_after = pd.Timestamp.now() - pd.Timedelta(days=MISSING_TTL_DAYS)
+        return [(start, end) for start, end, checked_at in self.missing().get((ticker, interval), [])
+                if checked_at > fresh_after]
+
+    def is_missing(self, ticker, start_date, end_date, interval='1d'):
+        return range_covered(self.missing_ranges(ticker, interval), start_date, end_date)
+
+    def mark_missing(self, ticker, start_date, end_date, interval='1d'):
+        missing = self.missing()
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        with self.lock:
+            checked_at = pd.Timestamp.now()
+            missing.setdefault((ticker, interval), []).append((start, end, checked_at))
+            os.makedirs(self.root, exist_ok=True)
+            is_new_file = not os.path.exists(self.missing_path())
+            with open(self.missing_path(), 'a') as f:
+                if is_new_file:
+                    f.write('ticker,interval,start,end,checked_at\n')
+                f.write(f'{ticker},{interval},{start.isoformat()},{end.isoformat()},{checked_at.isoformat()}\n')
+
+    def download_range(self, ticker, start_date, end_date, interval='1d'):
+        download = self.download or get_provider().download
+        return download(ticker, start_date, end_date, interval)
+
+    def load(self, ticker, interval='1d'):
+        path = self.path(ticker, interval)
+        if not os.path.exists(path):
+            return None
+        df = pd.read_parquet(path)
+        if df.attrs.get('clean_version') != CLEAN_VERSION:
+            # Written before validation existed (or by an older version): clean it once and rewrite
+            df = self.save(ticker, interval, df, df.attrs['covered_start'], df.attrs['covered_end'])
+        return df
+
+    def save(self, ticker, interval, df, covered_start, covered_end):
+        # Everything is validated and normalized here, once, before it reaches disk
+        df, report = clean_ohlcv(df)
+        if any(report[key] for key in ('unsorted', 'duplicate_dates', 'bad_close', 'repaired_bars')):
+            print(f"Cleaned {ticker}: {report}")
+        path = self.path(ticker, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.attrs['covered_start'] = pd.Timestamp(covered_start).isoformat()
+        df.attrs['covered_end'] = pd.Timestamp(covered_end).isoformat()
+        df.attrs['clean_version'] = CLEAN_VERSION
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+        return df
+
+    def fetch(self, ticker, start_date, end_date, interval='1d'):
+        start = pd.Timestamp(start_date)
+        end = min(pd.Timestamp(end_date), pd.Timestamp.today().normalize() + pd.Timedelta(days=1))
+        if interval in DERIVED_INTERVALS:
+            # Weekly/monthly bars are built from the daily series rather than downloaded and stored separately
+            daily = self.fetch(ticker, start, end, interval='1d')
+            if daily.empty:
+                return daily
+            df = resample_frame(daily, interval)
+            return df.loc[df.index >= start]
+
+        df = self.load(ticker, interval)
+
+        if df is None:
+            if self.is_missing(ticker, start, end, interval):
+                return pd.DataFrame()
+            df = self.download_range(ticker, start, end, interval)
+            if df.empty:
+                self.mark_missing(ticker, start, end, interval)
+                return df
+            df = self.save(ticker, interval, df, start, end)
+        else:
+            covered_start = pd.Timestamp(df.attrs['covered_start'])
+            covered_end = pd.Timestamp(df.attrs['covered_end'])
+            parts = [df]
+            if start < covered_start:
+                parts.insert(0, self.download_range(ticker, start, covered_start, interval))
+            if end > covered_end:
+                # Top up from the last stored bar so a partial (current month/day) bar gets replaced
+                top_up_from = df.index[-1] if len(df) else covered_end
+                parts.append(self.download_range(ticker, top_up_from, end, interval))
+            if len(parts) > 1:
+                df = pd.concat([part for part in parts if not part.empty])
+                df = df[~df.index.duplicated(keep='last')].sort_index()
+                df = self.save(ticker, interval, df, min(start, covered_start), max(end, covered_end))
+
+        return df.loc[(df.index >= start) & (df.index < end)]
@@ -0,0 +1,237 @@
+# stock_trading/strategies.py
+
+import backtrader as bt
+
+from .indicator_cache import cached_indicator, Supertrend, Consolidation
+from .strategy import EMA_PERIOD
+
+# The single-ticker strategies of the stock-by-stock scripts, importable by sweep and batch
+# workers. Indicators come from the shared cache, so strategies run on the same ticker
+# (stock_analysis.batch) compute a common indicator once. Feeds must be named after their
+# ticker. strategy.BuyAboveHigh is the pipeline's multi-data variant.
+
+class BuyAboveHigh(bt.Strategy):
+    params = (
+        ('ema_period', EMA_PERIOD),
+    )
+
+    def __init__(self):
+        self.ema = cached_indicator(self.data, 'ema', self.params.ema_period)
+        self.buy_signal = bt.indicators.CrossOver(self.data.close, self.ema)
+        self.buy_prices = []
+        self.sell_prices = []
+        self.stop_loss = None
+        self.target = None
+        self.trades = []  # To store trade details for reporting
+
+    def next(self):
+        if not self.position:
+            if self.data.close[0] > self.data.high[-1] and self.data.high[-1] < self.ema[-1]:
+                stop_loss = 0.75 * self.data.close[0]
+                target = 0.5 * self.data.close[0]  # Adjusted target calculation
+
+                size = self.broker.get_cash() // self.data.close[0]
+                size = min(size, 30000 // self.data.close[0])  # Ensure size is within max_cash constraint
+                if size > 0:
+                    print(f"Buying {size} shares of {self.data._name} at {self.data.close[0]} for a total of {size * self.data.close[0]}")
+                    self.buy(price=self.data.close[0], size=size)
+                    self.buy_prices.append((self.data.datetime.date(0), self.data.close[0]))
+                    self.stop_loss = stop_loss
+                    self.target = target
+        else:
+            if self.data.close[0] >= self.target or self.data.close[0] <= self.stop_loss:
+                print(f"Selling {self.position.size} shares of {self.data._name} at {self.data.close[0]}")
+                self.sell(price=self.data.close[0])
+                self.sell_prices.append((self.data.datetime.date(0), self.data.close[0]))
+                self.stop_loss = None
+                self.target = None
+
+    def notify_trade(self, trade):
+        if trade.isclosed:
+            trade_info = {
+                'ticker': trade.data._name,
+                'buy_date': self.buy_prices[-1][0] if self.buy_prices else None,
+                'buy_price': self.buy_prices[-1][1] if self.buy_prices else None,
+                'sell_date': self.sell_prices[-1][0] if self.sell_prices else None,
+                'sell_price': self.sell_prices[-1][1] if self.sell_prices else None,
+                'profit': trade.pnl,
+                'profit_percent': (trade.pnl / trade.price) * 100
+            }
+            self.trades.append(trade_info)
+            print(f'Closed: {trade.data._name}, Profit: {trade.pnl:.2f}, Buy Price: {trade_info["buy_price"]:.2f}, Sell Price: {trade_info["sell_price"]:.2f}')
+
+class BuyWithRSIAndMovingAverages(bt.Strategy):
+    params = (
+        ('ma_period1', 21),
+        ('ma_period2', 36),
+        ('rsi_period', 14),
+    )
+
+    def __init__(self):
+        self.ma1 = cached_indicator(self.data, 'sma', self.params.ma_period1)
+        self.ma2 = cached_indicator(self.data, 'sma', self.params.ma_period2)
+        self.rsi = cached_indicator(self.data, 'rsi', self.params.rsi_period)
+
+        self.buy_signal = bt.indicators.CrossOver(self.ma1, self.ma2)
+        self.buy_prices = []
+        self.sell_prices = []
+        self.stop_loss = None
+        self.target = None
+        self.trades = []
+
+    def next(self):
+        if not self.position:
+            if self.rsi[0] > 60 and self.buy_signal[0] == 1:
+                size = self.broker.get_cash() // self.data.close[0]
+                size = min(size, 30000 // self.data.close[0])
+                if size > 0:
+                    print(f"Buying {size} shares of {self.data._name} at {self.data.close[0]} for a total of {size * self.data.close[0]}")
+                    self.buy(price=self.data.close[0], size=size)
+                    self.buy_prices.append((self.data.datetime.date(0), self.data.close[0]))
+                    self.stop_loss = 0.75 * self.data.close[0]  # Set a stop-loss value if required
+        else:
+            if self.data.close[0] < self.ma2[0]:
+                print(f"Selling {self.position.size} shares of {self.data._name} at {self.data.close[0]}")
+                self.sell(price=self.data.close[0])
+                self.sell_prices.append((self.data.datetime.date(0), self.data.close[0]))
+                self.stop_loss = None
+                self.target = None
+
+    def notify_trade(self, trade):
+        if trade.isclosed:
+            trade_info = {
+                'ticker': trade.data._name,
+                'buy_date': self.buy_prices[-1][0] if self.buy_prices else None,
+                'buy_price': self.buy_prices[-1][1] if self.buy_prices else None,
+                'sell_date': self.sell_prices[-1][0] if self.sell_prices else None,
+                'sell_price': self.sell_prices[-1][1] if self.sell_prices else None,
+                'profit': trade.pnl,
+                'profit_percent': (trade.pnl / trade.price) * 100
+            }
+            self.trades.append(trade_info)
+            print(f'Closed: {trade.data._name}, Profit: {trade.pnl:.2f}, Buy Price: {trade_info["buy_price"]:.2f}, Sell Price: {trade_info["sell_price"]:.2f}')
+
+class MovingAverageCrossover(bt.Strategy):
+    params = (
+        ('fast_period', 10),
+        ('slow_period', 30),
+    )
+
+    def __init__(self):
+        self.fast_ma = cached_indicator(self.data, 'sma', self.params.fast_period)
+        self.slow_ma = cached_indicator(self.data, 'sma', self.params.slow_period)
+        self.crossover = bt.indicators.CrossOver(self.fast_ma, self.slow_ma)
+
+        self.buy_prices = []
+        self.sell_prices = []
+        self.trades = []
+
+    def next(self):
+        if not self.position:
+            if self.crossover > 0:  # Fast MA crosses above Slow MA
+                size = self.broker.get_cash() // self.data.close[0]
+                size = min(size, 30000 // self.data.close[0])
+                if size > 0:
+                    self.buy(price=self.data.close[0], size=size)
+                    self.buy_prices.append((self.data.datetime.date(0), self.data.close[0]))
+        else:
+            if self.crossover < 0:  # Fast MA crosses below Slow MA
+                self.sell(price=self.data.close[0])
+                self.sell_prices.append((self.data.datetime.date(0), self.data.close[0]))
+
+    def notify_trade(self, trade):
+        if trade.isclosed:
+            trade_info = {
+                'ticker': trade.data._name,
+                'buy_date': self.buy_prices[-1][0] if self.buy_prices else None,
+                'buy_price': self.buy_prices[-1][1] if self.buy_prices else None,
+                'sell_date': self.sell_prices[-1][0] if self.sell_prices else None,
+                'sell_price': self.sell_prices[-1][1] if self.sell_prices else None,
+                'profit': trade.pnl,
+                'profit_percent': (trade.pnl / trade.price) * 100 if trade.price else 0
+            }
+            self.trades.append(trade_info)
+
+class SupertrendStrategy(bt.Strategy):
+    params = (
+        ('period', 7),
+        ('multiplier', 3),
+    )
+
+    def __init__(self):
+        self.supertrend = Supertrend(self.data, period=self.params.period, multiplier=self.params.multiplier)
+        self.buy_prices = []
+        self.sell_prices = []
+        self.trades = []
+
+    def next(self):
+        if not self.position:
+            if self.supertrend.direction[0] == 1:
+                size = self.broker.get_cash() // self.data.close[0]
+                size = min(size, 30000 // self.data.close[0])
+                if size > 0:
+                    self.buy(size=size)
+                    self.buy_prices.append((self.data.datetime.date(0), self.data.close[0]))
+        elif self.supertrend.direction[0] == -1:
+            self.sell()
+            self.sell_prices.append((self.data.datetime.date(0), self.data.close[0]))
+
+    def notify_trade(self, trade):
+        if trade.isclosed:
+            trade_info = {
+                'ticker': trade.data._name,
+                'buy_date': self.buy_prices[-1][0] if self.buy_prices else None,
+                'buy_price': self.buy_prices[-1][1] if self.buy_prices else None,
+                'sell_date': self.sell_prices[-1][0] if self.sell_prices else None,
+                'sell_price': self.sell_prices[-1][1] if self.sell_prices else None,
+                'profit': trade.pnl,
+                'profit_percent': (trade.pnl / trade.price) * 100 if trade.price else 0
+            }
+            self.trades.append(trade_info)
+
+class ConsolidationBreakout(bt.Strategy):
+    params = (
+        ('consolidation_period', 3),  # Consolidation period in months
+        ('target_pct', 100),          # Target percentage of the closing price on breakout
+    )
+
+    def __init__(self):
+        # Range of the last consolidation_period * 22 closes, the current one included
+        self.consolidation = Consolidation(self.data, window=self.params.consolidation_period * 22)
+        self.buy_prices = []
+        self.sell_prices = []
+        self.trades = []
+
+    def next(self):
+        if not self.position:
+            if self.is_consolidating():
+                self.consolidation_low = self.consolidation.range_low[0]
+                self.consolidation_high = self.consolidation.range_high[0]
+                if self.data.close[0] > self.consolidation_high:  # Breakout condition
+                    size = self.broker.get_cash() // self.data.close[0]
+                    size = min(size, 30000 // self.data.close[0])
+                    if size > 0:
+                        self.buy(price=self.data.close[0], size=size)
+                        self.buy_prices.append((self.data.datetime.date(0), self.data.close[0]))
+                        self.target_price = self.data.close[0] * (1 + self.params.target_pct / 100)
+                        self.stop_price = self.consolidation_low
+        else:
+            if self.data.close[0] >= self.target_price or self.data.close[0] <= self.stop_price:
+                self.sell(price=self.data.close[0])
+                self.sell_prices.append((self.data.datetime.date(0), self.data.close[0]))
+
+    def is_consolidating(self):
+        return self.consolidation.in_range[0] == 1
+
+    def notify_trade(self, trade):
+        if trade.isclosed:
+            trade_info = {
+                'ticker': trade.data._name,
+                'buy_date': self.buy_prices[-1][0] if self.buy_prices else None,
+                'buy_price': self.buy_prices[-1][1] if self.buy_prices else None,
+                'sell_date': self.sell_prices[-1][0] if self.sell_prices else None,
+                'sell_price': self.sell_prices[-1][1] if self.sell_prices else None,
+                'profit': trade.pnl,
+                'profit_percent': (trade.pnl / trade.price) * 100 if trade.price else 0
+            }
+            self.trades.append(trade_info)
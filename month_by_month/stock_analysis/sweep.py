@@ -0,0 +1,109 @@
+# stock_trading/sweep.py
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+import backtrader as bt
+
+from .data_fetcher import fetch_data
+from .journal import run_context
+
+# Parameter sweeps over a universe on a process pool. Work is split by ticker: a worker
+# fetches a ticker's bars once and runs every parameter combination on them, so data and
+# cached indicators are reused, and each ticker's records come back to the parent as soon
+# as that ticker is done.
+
+_config = None
+
+def param_grid(**ranges):
+    # param_grid(fast_period=[5, 10], slow_period=[30, 40]) -> list of parameter dicts
+    names = list(ranges)
+    return [dict(zip(names, values)) for values in itertools.product(*ranges.values())]
+
+def trade_analysis_summary(trade_analysis):
+    # The TradeAnalyzer numbers the scripts report, as plain values that can cross processes
+    return {
+        'closed': trade_analysis.total.closed if 'total' in trade_analysis and 'closed' in trade_analysis.total else 0,
+        'won': trade_analysis.won.total if 'won' in trade_analysis else 0,
+        'lost': trade_analysis.lost.total if 'lost' in trade_analysis else 0,
+        'pnl_net': trade_analysis.pnl.net.total if 'pnl' in trade_analysis and 'net' in trade_analysis.pnl else None,
+    }
+
+def run_one(strategy, params, df, ticker, sizer=None, cash=100000):
+    # One cerebro run; returns (trades, summary) or raises like cerebro.run()
+    cerebro = bt.Cerebro()
+    cerebro.addstrategy(strategy, **params)
+    cerebro.adddata(bt.feeds.PandasData(dataname=df), name=ticker)
+    cerebro.broker.set_cash(cash)
+    if sizer is not None:
+        cerebro.addsizer(sizer)
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trade')
+    result = cerebro.run()[0]
+    return result.trades, trade_analysis_summary(result.analyzers.trade.get_analysis())
+
+def _init_worker(config):
+    global _config
+    _config = config
+
+def _run_ticker(ticker, indices=None):
+    # Every combination for one ticker, or those at the grid positions in indices. Each record
+    # is a dict with ticker, params and either trades/summary, an error message, or a skip reason.
+    config = _config
+    grid = config['grid'] if indices is None else [config['grid'][i] for i in indices]
+    if not grid:
+        return []
+    df = fetch_data(f"{ticker}{config['suffix']}", config['start_date'], config['end_date'], interval=config['interval'])
+    records = []
+    for params in grid:
+        record = {'ticker': ticker, 'params': params}
+        min_bars = config['min_bars'](params) if callable(config['min_bars']) else config['min_bars']
+        if df.empty:
+            record['skipped'] = 'No data'
+        elif len(df) < min_bars:
+            record['skipped'] = 'Not enough data'
+        else:
+            try:
+                record['trades'], record['summary'] = run_one(config['strategy'], params, df, ticker,
+                                                              sizer=config['sizer'], cash=config['cash'])
+            except Exception as e:
+                record['error'] = str(e)
+        records.append(record)
+    return records
+
+def run_sweep(strategy, grid, tickers, start_date, end_date, interval='1mo', suffix='.NS', sizer=None,
+              min_bars=0, cash=100000, workers=None, journal=None):
+    # Yields each ticker's list of records, in ticker order, while the pool keeps working.
+    # strategy and sizer must be importable by the workers (module level classes).
+    # min_bars is a number or a function of the parameter dict. With a journal.RunJournal,
+    # combinations already finished for a ticker with the same dates, interval, suffix and cash
+    # are replayed from it rather than run, and each ticker's new records are journaled as it
+    # completes.
+    config = {'strategy': strategy, 'grid': list(grid), 'start_date': start_date, 'end_date': end_date,
+              'interval': interval, 'suffix': suffix, 'sizer': sizer, 'min_bars': min_bars, 'cash': cash}
+    tickers = list(tickers)
+    if journal is None:
+        pending = [None] * len(tickers)
+    else:
+        name = strategy.__name__
+        context = run_context(start_date, end_date, interval, suffix, cash)
+        keys = [journal.params_key(params, context) for params in config['grid']]
+        done = journal.finished(name)
+        pending = [[i for i, key in enumerate(keys) if (key, ticker) not in done] for ticker in tickers]
+    for ticker, indices, records in zip(tickers, pending, _map_tickers(config, tickers, pending, workers)):
+        if journal is not None:
+            journal.record((name, keys[i], record) for i, record in zip(indices, records))
+            if len(indices) < len(keys):
+                replayed = journal.replay(name, ticker)
+                fresh = dict(zip(indices, records))
+                records = [fresh[i] if i in fresh else replayed[key] for i, key in enumerate(keys)]
+        yield records
+
+def _map_tickers(config, tickers, pending, workers):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(config)
+        for ticker, indices in zip(tickers, pending):
+            yield _run_ticker(ticker, indices)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config,)) as executor:
+        yield from executor.map(_run_ticker, tickers, pending)
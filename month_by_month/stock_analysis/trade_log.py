@@ -0,0 +1,160 @@
+# stock_trading/trade_log.py
+
+import glob
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+TRADE_LOG_BUFFER_ROWS = 5000
+TRADE_LOG_FLUSH_SECONDS = 30
+
+def common_dtype(dtypes):
+    # The dtype pd.concat gives frames with these column dtypes
+    if not dtypes:
+        return np.dtype(object)
+    return pd.concat([pd.Series([], dtype=dtype) for dtype in dtypes]).dtype
+
+class TradeLog:
+    # Append-only report rows on disk: appended frames are buffered and written out as
+    # numbered Parquet parts every buffer_rows rows or flush_seconds, whichever comes first, so
+    # memory stays at one buffer and a crash loses at most that. A one-row-per-ticker summary
+    # log would otherwise never reach buffer_rows. compact() streams the parts into the CSV a
+    # single pd.concat of everything appended would have produced. An existing log is cleared
+    # unless resume=True.
+    def __init__(self, directory, buffer_rows=TRADE_LOG_BUFFER_ROWS, flush_seconds=TRADE_LOG_FLUSH_SECONDS,
+                 resume=False):
+        self.directory = directory
+        self.buffer_rows = buffer_rows
+        self.flush_seconds = flush_seconds
+        self.buffer = []
+        self.buffered = 0
+        self.flushed_at = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        if not resume:
+            for path in self.parts():
+                os.remove(path)
+        self.next_part = len(self.parts())
+
+    def parts(self):
+        return sorted(glob.glob(os.path.join(self.directory, 'part-*.parquet')))
+
+    def append(self, rows):
+        # A DataFrame or a list of row dicts
+        frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+        if frame.empty:
+            return
+        self.buffer.append(frame)
+        self.buffered += len(frame)
+        if self.buffered >= self.buffer_rows or time.monotonic() - self.flushed_at >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        path = os.path.join(self.directory, f'part-{self.next_part:05d}.parquet')
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        pd.concat(self.buffer, ignore_index=True).to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        self.next_part += 1
+        self.buffer = []
+        self.buffered = 0
+        self.flushed_at = time.monotonic()
+
+    def dtypes(self):
+        # Column dtypes of the whole log the way pd.concat settles them, from the part schemas
+        columns = {}
+        for path in self.parts():
+            schema = pq.read_schema(path)
+            empty = schema.empty_table().to_pandas()
+            for column, dtype in empty.dtypes.items():
+                if str(schema.field(column).type) != 'null':
+                    columns.setdefault(column, []).append(dtype)
+                else:
+                    columns.setdefault(column, [])
+        return {column: common_dtype(dtypes) for column, dtypes in columns.items()}
+
+    def frames(self, columns=None):
+        # The log part by part, in append order, cast to the log's common dtypes; with columns,
+        # only those are read from the parts
+        self.flush()
+        dtypes = self.dtypes()
+        if columns is not None:
+            dtypes = {column: dtypes[column] for column in columns if column in dtypes}
+        for path in self.parts():
+            names = pq.read_schema(path).names
+            frame = pd.read_parquet(path, columns=[column for column in dtypes if column in names])
+            yield frame.reindex(columns=list(dtypes)).astype(dtypes)
+
+    def read(self, columns=None):
+        # The whole log as one frame, for summaries over a few columns of a large log
+        frames = list(self.frames(columns))
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def compact(self, path):
+        # Writes the CSV report and returns its row count; nothing is written for an empty log
+        rows = 0
+        for frame in self.frames():
+            frame.to_csv(path, mode='w' if rows == 0 else 'a', header=rows == 0, index=False)
+            rows += len(frame)
+        return rows
+
+def _partition_value(text):
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+class SweepDataset:
+    # A parameter sweep's report rows as one Parquet dataset partitioned by parameter value,
+    # hive style: root/MA1=14/MA2=30/RSI=14/part-00000.parquet. Each combination is a TradeLog
+    # of its own directory, written once or appended to through log() as tickers finish, and
+    # read() opens only the partitions it asks for. The parameter columns live in the directory
+    # names, not in the files.
+    def __init__(self, root, names):
+        self.root = root
+        self.names = list(names)
+
+    def partition(self, params):
+        return os.path.join(self.root, *(f'{name}={params[name]}' for name in self.names))
+
+    def log(self, params):
+        # A cleared TradeLog for the combination's rows, without the parameter columns
+        return TradeLog(self.partition(params))
+
+    def write(self, params, rows):
+        # Replaces the combination's rows (a DataFrame or a list of row dicts); returns how many
+        # were written
+        frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+        log = self.log(params)
+        log.append(frame.drop(columns=[name for name in self.names if name in frame]))
+        log.flush()
+        return len(frame)
+
+    def combinations(self, **params):
+        # Parameter dicts of the written combinations matching params, in parameter order
+        pattern = os.path.join(self.root, *(f'{name}={params.get(name, "*")}' for name in self.names))
+        found = []
+        for path in glob.glob(pattern):
+            parts = os.path.relpath(path, self.root).split(os.sep)
+            found.append({name: _partition_value(part.split('=', 1)[1]) for name, part in zip(self.names, parts)})
+        return sorted(found, key=lambda combination: [combination[name] for name in self.names])
+
+    def read(self, **params):
+        # Rows of the combinations matching params (every combination if none), with the
+        # parameter columns in front
+        frames = []
+        for combination in self.combinations(**params):
+            for frame in TradeLog(self.partition(combination), resume=True).frames():
+                for position, name in enumerate(self.names):
+                    frame.insert(position, name, combination[name])
+                frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=self.names)
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,131 @@
+# stock_trading/universe.py
+
+import os
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .store import OHLCVStore, range_covered
+from .market_cap import load_market_caps, read_snapshot
+
+def read_listing(path):
+    # NSE's EQUITY_L.csv: SYMBOL, NAME OF COMPANY, SERIES, DATE OF LISTING, ... (headers have leading spaces).
+    # No path means no listing data; a path that does not exist is an error rather than a
+    # universe whose listing filters silently keep everything.
+    if path is None:
+        return pd.DataFrame({'series': pd.Series(dtype='object'), 'listed': pd.Series(dtype='datetime64[ns]')})
+    if not os.path.exists(path):
+        raise FileNotFoundError(f'Listing file not found: {path}')
+    listing = pd.read_csv(path, skipinitialspace=True)
+    listing = listing.rename(columns={'SYMBOL': 'ticker', 'SERIES': 'series', 'DATE OF LISTING': 'listed'})
+    listing['listed'] = pd.to_datetime(listing['listed'], format='%d-%b-%Y', errors='coerce')
+    return listing.set_index('ticker')[['series', 'listed']]
+
+def stored_range(path):
+    # First/last bar and bar count from the Parquet footer, without reading any prices
+    metadata = pq.read_metadata(path)
+    date_column = metadata.schema.names.index('Date')
+    firsts, lasts = [], []
+    for i in range(metadata.num_row_groups):
+        statistics = metadata.row_group(i).column(date_column).statistics
+        if statistics is not None and statistics.has_min_max:
+            firsts.append(statistics.min)
+            lasts.append(statistics.max)
+    if not firsts:
+        index = pd.read_parquet(path, columns=[]).index
+        return index.min(), index.max(), len(index)
+    return min(firsts), max(lasts), metadata.num_rows
+
+def availability(tickers, suffix='', store=None):
+    store = store or OHLCVStore()
+    rows = []
+    for ticker in tickers:
+        path = store.path(f'{ticker}{suffix}')
+        if os.path.exists(path):
+            first_bar, last_bar, bars = stored_range(path)
+            rows.append((ticker, pd.Timestamp(first_bar), pd.Timestamp(last_bar), bars, []))
+        else:
+            rows.append((ticker, pd.NaT, pd.NaT, np.nan, store.missing_ranges(f'{ticker}{suffix}')))
+    return pd.DataFrame(rows, columns=['ticker', 'first_bar', 'last_bar', 'daily_bars', 'missing_ranges']).set_index('ticker')
+
+def bar_capacity(first_bar, last_bar, start, end, interval):
+    # Upper bound on the number of bars between the stored first/last bar, clipped to [start, end).
+    # Exact unless the ticker has gaps, so filtering on it never drops a ticker that would qualify.
+    first = first_bar.where(first_bar > start, start) if start is not None else first_bar
+    last = last_bar.where(last_bar < end, end - pd.Timedelta(days=1)) if end is not None else last_bar
+    if interval == '1mo':
+        count = (last.dt.year * 12 + last.dt.month) - (first.dt.year * 12 + first.dt.month) + 1
+    elif interval == '1wk':
+        count = ((last - pd.to_timedelta(last.dt.dayofweek, unit='D'))
+                 - (first - pd.to_timedelta(first.dt.dayofweek, unit='D'))).dt.days // 7 + 1
+    else:
+        valid = first.notna() & last.notna()
+        count = pd.Series(np.nan, index=first.index)
+        count[valid] = np.busday_count(first[valid].to_numpy().astype('datetime64[D]'),
+                                       last[valid].to_numpy().astype('datetime64[D]')) + 1
+    return count.where(first_bar.notna() & last_bar.notna()).clip(lower=0)
+
+class UniverseIndex:
+    # One row per ticker: listing metadata, stored data availability and market cap.
+    # Filters only drop a ticker when the data says it cannot qualify; a ticker missing
+    # from the listing file or not downloaded yet is kept unless require_known=True.
+    # Market cap bounds are the exception: like the old per-ticker check, no market cap
+    # means the ticker is skipped.
+    def __init__(self, frame):
+        self.frame = frame
+
+    @classmethod
+    def build(cls, tickers, listing_file=None, suffix='.NS', store=None, refresh_market_caps=True):
+        listing = read_listing(listing_file).reindex(tickers)
+        if refresh_market_caps:
+            market_caps = load_market_caps(tickers, suffix=suffix)
+        else:
+            market_caps = read_snapshot()['market_cap'].reindex([f'{ticker}{suffix}' for ticker in tickers])
+            market_caps.index = pd.Index(tickers)
+        frame = listing.join(availability(tickers, suffix=suffix, store=store))
+        frame['market_cap'] = market_caps
+        frame.index.name = 'ticker'
+        return cls(frame)
+
+    def mask(self, series=None, listed_before=None, min_bars=None, interval='1mo', start=None, end=None,
+             min_market_cap=None, max_market_cap=None, require_known=False):
+        frame = self.frame
+        keep = pd.Series(True, index=frame.index)
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        if start is not None and end is not None:
+            # Known to have no bars anywhere in the window
+            keep &= ~frame['missing_ranges'].map(
+                lambda ranges: isinstance(ranges, list) and range_covered(ranges, start, end))
+
+        def check(condition, known):
+            return condition | (~known if not require_known else False)
+
+        if series is not None:
+            series = [series] if isinstance(series, str) else list(series)
+            keep &= check(frame['series'].isin(series), frame['series'].notna())
+        if listed_before is not None:
+            keep &= check(frame['listed'] < pd.Timestamp(listed_before), frame['listed'].notna())
+        if start is not None or end is not None:
+            has_bars = frame['first_bar'].notna()
+            in_window = pd.Series(True, index=frame.index)
+            if end is not None:
+                in_window &= frame['first_bar'] < end
+            if start is not None:
+                in_window &= frame['last_bar'] >= start
+            keep &= check(in_window, has_bars)
+        if min_bars is not None:
+            capacity = bar_capacity(frame['first_bar'], frame['last_bar'], start, end, interval)
+            keep &= check(capacity >= min_bars, capacity.notna())
+        if min_market_cap is not None:
+            keep &= frame['market_cap'] >= min_market_cap
+        if max_market_cap is not None:
+            keep &= frame['market_cap'] < max_market_cap
+        return keep
+
+    def filter(self, **criteria):
+        return self.frame.index[self.mask(**criteria)].tolist()
+
+def load_universe(tickers, listing_file=None, suffix='.NS', refresh_market_caps=True):
+    return UniverseIndex.build(tickers, listing_file=listing_file, suffix=suffix,
+                               refresh_market_caps=refresh_market_caps)
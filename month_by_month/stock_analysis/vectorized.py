@@ -0,0 +1,54 @@
+# stock_trading/vectorized.py
+
+import numpy as np
+import pandas as pd
+
+def object_column(values, mask, index):
+    # values where mask, None elsewhere, as an object column like the loop's df['Signal'] = None
+    # followed by df.at writes: pandas 3 would infer str with NaN from a bare array of strings
+    column = np.full(len(values), None, dtype=object)
+    column[mask] = values[mask]
+    return pd.Series(column, index=index, dtype=object)
+
+def buy_above_high(df, ema_period=5, target_gain=2):
+    # Array version of the stock_by_stock_analysis apply_strategy loop, with identical output columns.
+    # Buy when the close clears the previous high and that high was below the previous
+    # EMA. Stop is the previous low and the target is close + target_gain * close.
+    # A new signal replaces an open position. Otherwise the position exits on the first bar
+    # whose low reaches the stop (checked first) or whose high reaches the target.
+    ema_column = f'{ema_period}_EMA'
+    df[ema_column] = df['Close'].ewm(span=ema_period, adjust=False).mean()
+    close = df['Close'].to_numpy(dtype='float64')
+    high = df['High'].to_numpy(dtype='float64')
+    low = df['Low'].to_numpy(dtype='float64')
+    ema = df[ema_column].to_numpy(dtype='float64')
+    n = len(df)
+
+    signal = np.zeros(n, dtype=bool)
+    signal[1:] = (high[:-1] < ema[:-1]) & (close[1:] > high[:-1])
+    stop_loss = np.full(n, np.nan)
+    stop_loss[1:] = low[:-1]
+    target = close + target_gain * close
+
+    # Every bar belongs to the segment of the latest signal at or before it. Only the
+    # first stop/target hit inside a segment closes that segment's trade.
+    segment = np.maximum.accumulate(np.where(signal, np.arange(n), -1))
+    in_position = segment >= 0
+    entry = segment.clip(min=0)
+    stop_hit = in_position & (low <= stop_loss[entry])
+    target_hit = in_position & (high >= target[entry])
+    hit_rows = np.flatnonzero(stop_hit | target_hit)
+    _, first = np.unique(segment[hit_rows], return_index=True)
+    exit_rows = hit_rows[first]
+
+    pnl = np.full(n, np.nan)
+    exit_entry = entry[exit_rows]
+    pnl[exit_rows] = np.where(stop_hit[exit_rows], stop_loss[exit_entry], target[exit_entry]) - close[exit_entry]
+    exited = np.zeros(n, dtype=bool)
+    exited[exit_rows] = True
+
+    df['Signal'] = object_column(np.full(n, 'Buy', dtype=object), signal, df.index)
+    df['StopLoss'] = object_column(stop_loss, signal, df.index)
+    df['Target'] = object_column(target, signal, df.index)
+    df['PnL'] = object_column(pnl, exited, df.index)
+    return df
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from stock_analysis.cache import FetchCache
+
+class CountingFetch:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, ticker, start, end, interval='1d'):
+        self.calls.append((ticker, start, end))
+        dates = pd.date_range(start, end, freq='D', inclusive='left', name='Date')
+        return pd.DataFrame({'Close': np.arange(len(dates), dtype='float64')}, index=dates)
+
+def frame_bytes(days):
+    return int(CountingFetch()('X', '2020-01-01', pd.Timestamp('2020-01-01') + pd.Timedelta(days=days))
+               .memory_usage(deep=True).sum())
+
+def test_least_recently_used_frames_are_evicted_past_max_bytes():
+    fetch = CountingFetch()
+    cache = FetchCache(fetch, max_bytes=2 * frame_bytes(31))
+    for ticker in ('A', 'B', 'A', 'C'):
+        cache.get(ticker, '2020-01-01', '2020-02-01')
+    assert [ticker for ticker, _ in cache.frames] == ['A', 'C']
+    assert cache.nbytes == 2 * frame_bytes(31)
+
+    fetch.calls = []
+    cache.get('A', '2020-01-10', '2020-01-20')
+    cache.get('B', '2020-01-01', '2020-02-01')
+    assert [ticker for ticker, _, _ in fetch.calls] == ['B']
+    assert [ticker for ticker, _ in cache.frames] == ['A', 'B']
+
+def test_a_widened_range_replaces_the_frame_size():
+    cache = FetchCache(CountingFetch(), max_bytes=frame_bytes(60))
+    cache.get('A', '2020-01-01', '2020-02-01')
+    cache.get('A', '2020-01-01', '2020-03-01')
+    assert cache.nbytes == frame_bytes(60)
+    cache.get('B', '2020-01-01', '2020-01-02')
+    assert [ticker for ticker, _ in cache.frames] == ['B']
+    assert cache.nbytes == frame_bytes(1)
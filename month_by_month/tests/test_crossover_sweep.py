@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from stock_analysis.crossover_sweep import crossover_sweep
+from stock_analysis.panel import Panel, FIELDS
+from stock_analysis.panel_backtest import backtest_panel, PanelMovingAverageCrossover
+
+FAST_PERIODS = [5, 7, 10]
+SLOW_PERIODS = [30, 35, 40]
+
+def flat_segment_panel(n_tickers=40, n_bars=240, seed=0):
+    # Random walks with long stretches of unchanged closes, where fast - slow is exactly 0
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.05, (n_tickers, n_bars))
+    for i in range(n_tickers):
+        for start in rng.integers(0, n_bars - 60, 3):
+            steps[i, start:start + int(rng.integers(35, 60))] = 0.0
+    close = np.round(100 * np.exp(np.cumsum(steps, axis=1)), 2)
+    values = np.empty((n_tickers, n_bars, len(FIELDS)))
+    for field, column in (('Open', np.roll(close, 1, axis=1)), ('High', close * 1.01), ('Low', close * 0.99),
+                          ('Close', close), ('Adj Close', close), ('Volume', np.full(close.shape, 1000.0)),
+                          ('Adj Open', np.roll(close, 1, axis=1)), ('Adj High', close * 1.01), ('Adj Low', close * 0.99)):
+        values[:, :, FIELDS.index(field)] = column
+    values[:, 0, FIELDS.index('Open')] = close[:, 0]
+    values[:, 0, FIELDS.index('Adj Open')] = close[:, 0]
+    dates = pd.date_range('2000-01-01', periods=n_bars, freq='MS', name='Date')
+    return Panel(values, dates, [f'T{i}' for i in range(n_tickers)], FIELDS)
+
+def test_sweep_matches_the_per_pair_panel_backtest_on_flat_prices():
+    panel = flat_segment_panel()
+    swept = crossover_sweep(panel, FAST_PERIODS, SLOW_PERIODS, min_bars=max(SLOW_PERIODS), chunk_size=15)
+    order = {ticker: i for i, ticker in enumerate(panel.tickers)}
+    frames = []
+    for fast in FAST_PERIODS:
+        for slow in SLOW_PERIODS:
+            _, trades = backtest_panel(panel, PanelMovingAverageCrossover(fast, slow), min_bars=max(SLOW_PERIODS))
+            trades['Ticker'] = trades['ticker']
+            trades['Fast Period'] = fast
+            trades['Slow Period'] = slow
+            frames.append(trades)
+    expected = pd.concat(frames, ignore_index=True)
+    expected = expected.sort_values('ticker', key=lambda tickers: tickers.map(order), kind='stable')
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(swept.reset_index(drop=True), expected.reset_index(drop=True))
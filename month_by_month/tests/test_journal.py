@@ -0,0 +1,94 @@
+import os
+
+import pandas as pd
+import pytest
+
+from stock_analysis import data_fetcher
+from stock_analysis.batch import run_batch, BatchReports
+from stock_analysis.journal import RunJournal
+from stock_analysis.providers import SyntheticProvider, set_provider
+from stock_analysis.sizer import MaxCashSizer
+from stock_analysis.strategies import MovingAverageCrossover, SupertrendStrategy
+from stock_analysis.sweep import run_sweep, param_grid
+from stock_analysis.trade_log import SweepDataset
+
+START_DATE = '2005-01-01'
+END_DATE = '2024-06-14'
+TICKERS = [f'SYN{i:04d}' for i in range(12)]
+RUNS = {
+    'moving_average_crossover': {'strategy': MovingAverageCrossover, 'params': {'fast_period': 10, 'slow_period': 20},
+                                 'sizer': MaxCashSizer, 'min_bars': 20},
+    'supertrend': {'strategy': SupertrendStrategy, 'sizer': MaxCashSizer, 'adjusted': True},
+}
+
+@pytest.fixture(autouse=True)
+def synthetic_store(tmp_path, monkeypatch):
+    set_provider(SyntheticProvider())
+    monkeypatch.setattr(data_fetcher.store, 'root', str(tmp_path / 'store'))
+    data_fetcher.cache.clear()
+    yield
+    data_fetcher.cache.clear()
+    set_provider(None)
+
+def batch_reports(directory, tickers, journal=None):
+    reports = BatchReports(RUNS, directory=directory)
+    for records in run_batch(RUNS, tickers, START_DATE, END_DATE, workers=1, journal=journal):
+        reports.add(records)
+    reports.save()
+    return {name: open(os.path.join(directory, name)).read() for name in sorted(os.listdir(directory))
+            if name.endswith('.csv')}
+
+def test_resumed_batch_writes_the_uninterrupted_reports(tmp_path):
+    expected = batch_reports(str(tmp_path / 'uninterrupted'), TICKERS)
+
+    journal = RunJournal(str(tmp_path / 'journal.sqlite'))
+    batch_reports(str(tmp_path / 'resumed'), TICKERS[:6], journal=journal)
+    assert {ticker for _, ticker in journal.finished('supertrend')} == set(TICKERS[:6])
+    assert batch_reports(str(tmp_path / 'resumed'), TICKERS, journal=journal) == expected
+    journal.close()
+
+def sweep_dataset(root, tickers, journal=None):
+    grid = param_grid(fast_period=[5, 10], slow_period=[20, 30])
+    runs = [[] for _ in grid]
+    for records in run_sweep(MovingAverageCrossover, grid, tickers, START_DATE, END_DATE, sizer=MaxCashSizer,
+                             min_bars=30, workers=1, journal=journal):
+        for run, record in zip(runs, records):
+            run.append(record)
+    dataset = SweepDataset(root, ['Fast', 'Slow'])
+    for params, records in zip(grid, runs):
+        trades = [pd.DataFrame(record['trades']) for record in records if record.get('trades')]
+        if trades:
+            dataset.write({'Fast': params['fast_period'], 'Slow': params['slow_period']},
+                          pd.concat(trades, ignore_index=True))
+    return dataset.read()
+
+def test_resumed_sweep_writes_the_uninterrupted_dataset(tmp_path):
+    expected = sweep_dataset(str(tmp_path / 'uninterrupted'), TICKERS)
+
+    journal = RunJournal(str(tmp_path / 'journal.sqlite'))
+    sweep_dataset(str(tmp_path / 'resumed'), TICKERS[:6], journal=journal)
+    resumed = sweep_dataset(str(tmp_path / 'resumed'), TICKERS, journal=journal)
+    journal.close()
+    pd.testing.assert_frame_equal(resumed, expected)
+
+def test_a_changed_date_range_is_run_again(tmp_path):
+    journal = RunJournal(str(tmp_path / 'journal.sqlite'))
+    grid = param_grid(fast_period=[5], slow_period=[20])
+    list(run_sweep(MovingAverageCrossover, grid, TICKERS[:3], START_DATE, END_DATE, sizer=MaxCashSizer,
+                   workers=1, journal=journal))
+    expected = list(run_sweep(MovingAverageCrossover, grid, TICKERS[:3], START_DATE, '2015-06-30',
+                              sizer=MaxCashSizer, workers=1))
+    assert list(run_sweep(MovingAverageCrossover, grid, TICKERS[:3], START_DATE, '2015-06-30',
+                          sizer=MaxCashSizer, workers=1, journal=journal)) == expected
+
+    expected = batch_reports(str(tmp_path / 'uninterrupted'), TICKERS[:3])
+    batch_reports(str(tmp_path / 'full'), TICKERS[:3], journal=journal)
+    shorter = BatchReports(RUNS, directory=str(tmp_path / 'shorter'))
+    for records in run_batch(RUNS, TICKERS[:3], START_DATE, '2015-06-30', workers=1, journal=journal):
+        shorter.add(records)
+    shorter.save()
+    assert batch_reports(str(tmp_path / 'full'), TICKERS[:3], journal=journal) == expected
+    assert open(str(tmp_path / 'shorter' / 'supertrend_completed_trades_report.csv')).read() != \
+        expected['supertrend_completed_trades_report.csv']
+    assert len(journal.finished('supertrend')) == 6
+    journal.close()
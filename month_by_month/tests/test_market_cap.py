@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from stock_analysis.market_cap import load_market_caps, read_snapshot
+from stock_analysis.providers import DataProvider, set_provider
+
+class FlakyProvider(DataProvider):
+    # BAD has no market cap; DOWN fails until it is marked up
+    def __init__(self):
+        self.down = True
+        self.requests = []
+
+    def market_cap(self, ticker):
+        self.requests.append(ticker)
+        if ticker == 'DOWN' and self.down:
+            raise ConnectionError('rate limited')
+        return None if ticker == 'BAD' else 1e12
+
+@pytest.fixture
+def provider():
+    provider = FlakyProvider()
+    set_provider(provider)
+    yield provider
+    set_provider(None)
+
+def test_failed_requests_stay_stale_and_are_retried(tmp_path, provider):
+    path = str(tmp_path / 'market_caps.parquet')
+    market_caps = load_market_caps(['GOOD', 'BAD', 'DOWN'], path=path)
+    assert market_caps['GOOD'] == 1e12
+    assert np.isnan(market_caps['DOWN'])
+    assert 'DOWN' not in read_snapshot(path).index
+
+    provider.down = False
+    provider.requests = []
+    market_caps = load_market_caps(['GOOD', 'BAD', 'DOWN'], path=path)
+    assert provider.requests == ['DOWN']
+    assert market_caps['DOWN'] == 1e12
+
+def test_a_missing_market_cap_is_cached_as_nan(tmp_path, provider):
+    path = str(tmp_path / 'market_caps.parquet')
+    assert np.isnan(load_market_caps(['BAD'], path=path)['BAD'])
+    provider.requests = []
+    assert np.isnan(load_market_caps(['BAD'], path=path)['BAD'])
+    assert provider.requests == []
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from stock_analysis.trade_log import SweepDataset, TradeLog
+
+def ticker_trades(ticker, profits):
+    return pd.DataFrame({'ticker': ticker, 'buy_date': pd.Timestamp('2020-01-01'), 'profit': profits,
+                         'Ticker': ticker})
+
+def test_columns_are_read_back_across_parts(tmp_path):
+    frames = [ticker_trades('A', [1.5, -2.0]), ticker_trades('B', [3]), ticker_trades('C', [0.25, 4.0, -1.0])]
+    log = TradeLog(str(tmp_path / 'trades'), buffer_rows=2)
+    for frame in frames:
+        log.append(frame)
+    assert log.compact(str(tmp_path / 'trades.csv')) == 6
+    assert len(log.parts()) == 2
+
+    expected = pd.concat(frames, ignore_index=True)
+    pd.testing.assert_frame_equal(log.read(columns=['Ticker', 'profit']), expected[['Ticker', 'profit']])
+    pd.testing.assert_frame_equal(log.read(), expected)
+
+def test_sweep_dataset_log_appends_a_partition_as_tickers_finish(tmp_path):
+    dataset = SweepDataset(str(tmp_path / 'sweep'), ['MA1', 'MA2'])
+    log = dataset.log({'MA1': 14, 'MA2': 30})
+    for ticker, profits in (('A', [1.0]), ('B', [2.0, -1.0])):
+        log.append(ticker_trades(ticker, profits))
+        log.flush()
+
+    rows = dataset.read(MA1=14)
+    assert list(rows.columns[:2]) == ['MA1', 'MA2']
+    assert rows['Ticker'].tolist() == ['A', 'B', 'B']
+    assert (rows['MA2'] == 30).all()
+
+    # A new log clears the partition's earlier rows
+    dataset.log({'MA1': 14, 'MA2': 30}).flush()
+    assert dataset.read(MA1=14).empty
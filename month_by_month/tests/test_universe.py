@@ -0,0 +1,21 @@
+import pandas as pd
+import pytest
+
+from stock_analysis.universe import read_listing
+
+LISTING = '''SYMBOL,NAME OF COMPANY, SERIES, DATE OF LISTING, PAID UP VALUE
+AAA,Aaa Ltd,EQ,06-OCT-2008,10
+BBB,Bbb Ltd,BE,14-FEB-2019,2
+'''
+
+def test_listing_is_read_from_the_given_path(tmp_path):
+    path = tmp_path / 'EQUITY_L.csv'
+    path.write_text(LISTING)
+    listing = read_listing(path)
+    assert listing.loc['BBB', 'series'] == 'BE'
+    assert listing.loc['AAA', 'listed'] == pd.Timestamp('2008-10-06')
+
+def test_a_missing_listing_file_raises(tmp_path):
+    assert read_listing(None).empty
+    with pytest.raises(FileNotFoundError):
+        read_listing(tmp_path / 'EQUITY_L.csv')
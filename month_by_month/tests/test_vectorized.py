@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from stock_analysis.vectorized import buy_above_high
+
+def apply_strategy(df, target_gain=2):
+    # stock_by_stock_analysis's original loop
+    df['5_EMA'] = df['Close'].ewm(span=5, adjust=False).mean()
+    df['Signal'] = None
+    df['StopLoss'] = None
+    df['Target'] = None
+    for i in range(1, len(df)):
+        prev_candle = df.iloc[i - 1]
+        curr_candle = df.iloc[i]
+        if prev_candle['High'] < prev_candle['5_EMA'] and curr_candle['Close'] > prev_candle['High']:
+            df.at[df.index[i], 'Signal'] = 'Buy'
+            df.at[df.index[i], 'StopLoss'] = prev_candle['Low']
+            df.at[df.index[i], 'Target'] = curr_candle['Close'] + target_gain * curr_candle['Close']
+    df['PnL'] = None
+    position = None
+    for i in range(len(df)):
+        if df.at[df.index[i], 'Signal'] == 'Buy':
+            position = 'Long'
+            entry_price = df.at[df.index[i], 'Close']
+            stop_loss = df.at[df.index[i], 'StopLoss']
+            target = df.at[df.index[i], 'Target']
+        if position == 'Long':
+            if df.at[df.index[i], 'Low'] <= stop_loss:
+                df.at[df.index[i], 'PnL'] = stop_loss - entry_price
+                position = None
+            elif df.at[df.index[i], 'High'] >= target:
+                df.at[df.index[i], 'PnL'] = target - entry_price
+                position = None
+    return df
+
+def monthly_bars(n=240, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.08, n)))
+    spread = np.abs(rng.normal(0, 0.05, n)) * close
+    return pd.DataFrame({'Close': close, 'High': close + spread, 'Low': close - spread},
+                        index=pd.date_range('2000-01-01', periods=n, freq='MS', name='Date'))
+
+def test_signal_columns_match_the_loop_as_object_columns():
+    for target_gain in (1, 2):
+        expected = apply_strategy(monthly_bars(), target_gain=target_gain)
+        result = buy_above_high(monthly_bars(), target_gain=target_gain)
+        assert (result[['Signal', 'StopLoss', 'Target', 'PnL']].dtypes == object).all()
+        assert result['Signal'].tolist().count('Buy') > 0
+        assert all(signal in ('Buy', None) for signal in result['Signal'])
+        pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,43 @@
+from stock_analysis.universe import load_universe
+from stock_analysis.batch import run_batch, BatchReports
+from stock_analysis.journal import RunJournal
+from stock_analysis.sizer import MaxCashSizer
+from stock_analysis.strategies import (BuyAboveHigh, BuyWithRSIAndMovingAverages, MovingAverageCrossover,
+                                       SupertrendStrategy, ConsolidationBreakout)
+import pandas as pd
+from pathlib import Path
+
+LISTING_FILE = Path(__file__).resolve().parent / 'EQUITY_L.csv'
+
+# Every strategy of the stock-by-stock scripts over one universe, each ticker fetched once.
+# Adding a strategy is one more entry here.
+RUNS = {
+    'buy_above_high': {'strategy': BuyAboveHigh, 'sizer': MaxCashSizer, 'min_bars': 5},
+    'rsi_moving_averages': {'strategy': BuyWithRSIAndMovingAverages, 'sizer': MaxCashSizer, 'min_bars': max(21, 36, 14)},
+    'moving_average_crossover': {'strategy': MovingAverageCrossover, 'params': {'fast_period': 25, 'slow_period': 30},
+                                 'sizer': MaxCashSizer, 'min_bars': 30},
+    'supertrend': {'strategy': SupertrendStrategy, 'sizer': MaxCashSizer, 'adjusted': True},
+    'consolidation_breakout': {'strategy': ConsolidationBreakout, 'sizer': MaxCashSizer, 'adjusted': True},
+}
+
+def main():
+    start_date = '2005-01-01'
+    end_date = '2024-06-14'
+
+    equity_file = 'equity_full.csv'
+    stocks = pd.read_csv(equity_file)['Ticker'].tolist()
+    universe = load_universe(stocks, listing_file=LISTING_FILE)
+    stocks = universe.filter(listed_before=end_date, start=start_date, end=end_date, interval='1mo',
+                             min_market_cap=2000000000)  # 2000 crore
+
+    # Finished (strategy, ticker) units are journaled, so rerunning after an interruption only
+    # runs what is left; the reports are rebuilt from the journal and the new records
+    journal = RunJournal(f'batch_reports/journal_{start_date}_{end_date}_1mo.sqlite')
+    reports = BatchReports(RUNS, directory='batch_reports')
+    for records in run_batch(RUNS, stocks, start_date, end_date, journal=journal):
+        reports.add(records)
+    reports.save()
+    journal.close()
+
+if __name__ == '__main__':
+    main()
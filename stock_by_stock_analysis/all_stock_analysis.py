@@ -1,52 +1,19 @@
 import os
 import pandas as pd
-import yfinance as yf
+from stock_analysis.data_fetcher import fetch_data as fetch_stored_data
+from stock_analysis.vectorized import buy_above_high
 import matplotlib.pyplot as plt
 
 
 # Function to fetch stock data (monthly)
 def fetch_data(ticker, start_date, end_date):
-    df = yf.download(ticker, start=start_date, end=end_date, interval='1mo')
+    df = fetch_stored_data(ticker, start_date, end_date, interval='1mo')
     return df
 
 # Function to implement the trading strategy on monthly data
 def apply_strategy(df):
-    df['5_EMA'] = df['Close'].ewm(span=5, adjust=False).mean()
-    df['Signal'] = None
-    df['StopLoss'] = None
-    df['Target'] = None
-
-    for i in range(1, len(df)):
-        prev_candle = df.iloc[i-1]
-        curr_candle = df.iloc[i]
-
-        if prev_candle['High'] < prev_candle['5_EMA'] and curr_candle['Close'] > prev_candle['High']:
-            df.at[df.index[i], 'Signal'] = 'Buy'
-            df.at[df.index[i], 'StopLoss'] = prev_candle['Low']
-            df.at[df.index[i], 'Target'] = curr_candle['Close'] + 2 * curr_candle['Close'] # - prev_candle['Low'])
-
-    df['PnL'] = None
-    position = None
-    entry_price = 0
-    stop_loss = 0
-    target = 0
-
-    for i in range(len(df)):
-        if df.at[df.index[i], 'Signal'] == 'Buy':
-            position = 'Long'
-            entry_price = df.at[df.index[i], 'Close']
-            stop_loss = df.at[df.index[i], 'StopLoss']
-            target = df.at[df.index[i], 'Target']
-
-        if position == 'Long':
-            if df.at[df.index[i], 'Low'] <= stop_loss:
-                df.at[df.index[i], 'PnL'] = stop_loss - entry_price
-                position = None
-            elif df.at[df.index[i], 'High'] >= target:
-                df.at[df.index[i], 'PnL'] = target - entry_price
-                position = None
-
-    return df
+    # Buy above the previous high; stop at the previous low, target 3x the entry close
+    return buy_above_high(df, ema_period=5, target_gain=2)
 
 # Function to generate the report
 def generate_report(df, ticker):